@@ -0,0 +1,146 @@
+# Difficulty-curve analyzer: builds tower chunks straight from the generator
+# across a process pool and reports, per height band, the platform-type mix,
+# hazard and powerup density, and how many gaps between consecutive platforms
+# the player's jump physics can actually cover.
+#
+#   python analyze.py --seeds 4 --chunks 100000 [--band 1000] [--bands 12] [--json out.json]
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from collections import Counter
+
+# The report goes to stdout, so keep pygame's banner off it
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from tower_jumper import (
+    TowerGenerator, PlatformType, HAZARD_KINDS, platform_pool, powerup_pool, hazard_pool,
+    jump_envelope, standing_span, START_PLATFORM, TOWER_BASE_Y, CHUNK_HEIGHT,
+)
+from rollouts import init_worker
+
+CHUNKS_PER_TASK = 2000
+GAP_CLASSES = ("jump", "double_jump", "bounce_jump", "impossible")
+
+def classify_gap(source, target):
+    # The cheapest way up from source to target, or "impossible", looked up
+    # in the same jump envelope the generator places platforms with
+    source_left, source_right = standing_span(source.x, source.width, source.platform_type)
+    target_left, target_right = standing_span(target.x, target.width, target.platform_type)
+    distance = max(0, target_left - source_right, source_left - target_right)
+    rise = source.y - target.y
+    if source.platform_type == PlatformType.BOUNCE:
+        # Landing on a bounce platform always launches the player
+        return "bounce_jump" if jump_envelope.reach("bounce", rise) >= distance else "impossible"
+    if jump_envelope.reach("jump", rise) >= distance:
+        return "jump"
+    if jump_envelope.reach("double", rise) >= distance:
+        return "double_jump"
+    return "impossible"
+
+def band_of(y, band_height, bands):
+    return min(max(0, int(TOWER_BASE_Y - y) // band_height), bands - 1)
+
+def analyze_chunks(task):
+    # Aggregates one run of consecutive chunks into (band, key) counts; the
+    # chunks are released back to the entity pools as soon as they are read
+    seed, first, count, band_height, bands = task
+    tower = TowerGenerator(seed)
+    totals = Counter()
+    if first == 0:
+        previous = platform_pool.acquire(*START_PLATFORM)
+    else:
+        chunk = tower.build(first - 1)
+        previous = chunk.platforms.pop()
+        release_chunk(chunk)
+    for index in range(first, first + count):
+        chunk = tower.build(index)
+        totals[band_of(chunk.top + CHUNK_HEIGHT, band_height, bands), "chunks"] += 1
+        for platform in chunk.platforms:
+            band = band_of(platform.y, band_height, bands)
+            totals[band, "rows"] += 1
+            totals[band, platform.platform_type.name.lower()] += 1
+            totals[band, classify_gap(previous, platform)] += 1
+            platform_pool.release(previous)
+            previous = platform
+        chunk.platforms.clear()
+        for hazard in chunk.hazards:
+            totals[band_of(hazard.y, band_height, bands), hazard.hazard_type] += 1
+        for powerup in chunk.powerups:
+            totals[band_of(powerup.y, band_height, bands), "powerups"] += 1
+        release_chunk(chunk)
+    platform_pool.release(previous)
+    return totals
+
+def release_chunk(chunk):
+    platform_pool.release_all(chunk.platforms)
+    powerup_pool.release_all(chunk.powerups)
+    hazard_pool.release_all(chunk.hazards)
+
+def run_analysis(seeds, chunks, base_seed=0, band_height=CHUNK_HEIGHT, bands=12, processes=None):
+    # Per-task counts are folded into one Counter as they arrive, so memory
+    # stays bounded by bands x keys however many chunks are analyzed
+    tasks = [(base_seed + seed, first, min(CHUNKS_PER_TASK, chunks - first), band_height, bands)
+             for seed in range(seeds) for first in range(0, chunks, CHUNKS_PER_TASK)]
+    totals = Counter()
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes or os.cpu_count(), initializer=init_worker) as pool:
+        for counts in pool.imap_unordered(analyze_chunks, tasks):
+            totals.update(counts)
+    return totals
+
+def band_report(totals, band_height, bands):
+    # One row of rates per height band, from the raw counts
+    report = []
+    for band in range(bands):
+        rows = totals[band, "rows"]
+        if not rows:
+            continue
+        top = "+" if band == bands - 1 else f"-{(band + 1) * band_height}"
+        row = {"band": f"{band * band_height}{top}", "rows": rows, "chunks": totals[band, "chunks"]}
+        for platform_type in PlatformType:
+            name = platform_type.name.lower()
+            row[name] = totals[band, name] / rows
+        for gap in GAP_CLASSES:
+            row[gap] = totals[band, gap] / rows
+        row["impossible_gaps"] = totals[band, "impossible"]
+        hazards = sum(totals[band, kind] for kind in HAZARD_KINDS)
+        row["hazards_per_row"] = hazards / rows
+        for kind in HAZARD_KINDS:
+            row[kind] = totals[band, kind] / max(hazards, 1)
+        row["powerups_per_row"] = totals[band, "powerups"] / rows
+        report.append(row)
+    return report
+
+def print_report(report):
+    print(f"{'Height':>12} {'Rows':>10} {'Static':>7} {'Bounce':>7} {'Moving':>7} {'Break':>7}"
+          f" {'Jump':>7} {'Double':>7} {'Bounce':>7} {'Imposs.':>8}"
+          f" {'Haz/row':>8} {'Spike':>6} {'Bird':>6} {'Rock':>6} {'Pow/row':>8}")
+    for row in report:
+        print(f"{row['band']:>12} {row['rows']:>10} {row['static']:>7.1%} {row['bounce']:>7.1%}"
+              f" {row['moving']:>7.1%} {row['breaking']:>7.1%} {row['jump']:>7.1%}"
+              f" {row['double_jump']:>7.1%} {row['bounce_jump']:>7.1%} {row['impossible']:>8.2%}"
+              f" {row['hazards_per_row']:>8.3f} {row['spike']:>6.0%} {row['bird']:>6.0%}"
+              f" {row['rock']:>6.0%} {row['powerups_per_row']:>8.3f}")
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Analyze the tower generator's difficulty curve")
+    parser.add_argument("--seeds", type=int, default=1, help="number of seeds to analyze")
+    parser.add_argument("--seed", type=int, default=0, help="base seed; seed i is seed + i")
+    parser.add_argument("--chunks", type=int, default=100000, help="chunks built per seed")
+    parser.add_argument("--band", type=int, default=CHUNK_HEIGHT, help="height band size in px")
+    parser.add_argument("--bands", type=int, default=12, help="band count; the last band is open-ended")
+    parser.add_argument("--processes", type=int, default=None, help="worker count (default: all cores)")
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    totals = run_analysis(args.seeds, args.chunks, args.seed, args.band, args.bands, args.processes)
+    report = band_report(totals, args.band, args.bands)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
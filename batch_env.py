@@ -0,0 +1,237 @@
+# Lockstep batch simulator: N independent headless climbs advanced by one
+# step() call, with the player physics of every world run as NumPy batches.
+#
+#   python batch_env.py [world_count] [steps]
+#   python batch_env.py --check [world_count] [steps] [--vectorized]   # exits 1 on a mismatch
+import sys
+import time
+
+import pygame
+
+from tower_jumper import (
+    np, Game, Player, EntityArrays, EntityView, array_field,
+    SCREEN_WIDTH, GRAVITY, JUMP_FORCE, PLAYER_SPEED,
+)
+
+class PlayerView(EntityView):
+    # Player API onto one row of PlayerArrays. The collision rect is a real
+    # pygame.Rect so Player.check_platform_collisions can adjust it in place.
+    __slots__ = ("rect",)
+    width = 30
+    height = 50
+    score = 0
+    animation_speed = 5
+    x = array_field("x")
+    y = array_field("y")
+    vel_x = array_field("vel_x")
+    vel_y = array_field("vel_y")
+    is_jumping = array_field("is_jumping", bool)
+    can_double_jump = array_field("can_double_jump", bool)
+    has_wings = array_field("has_wings", bool)
+    slow_time = array_field("slow_time", bool)
+    magnet = array_field("magnet", bool)
+    facing_right = array_field("facing_right", bool)
+    current_frame = array_field("current_frame", int)
+    animation_timer = array_field("animation_timer", int)
+
+    def __init__(self, arrays, index):
+        super().__init__(arrays, index)
+        self.rect = pygame.Rect(0, 0, self.width, self.height)
+
+    def reset(self, x, y):
+        self.arrays.reset(self.index, x, y)
+
+    check_platform_collisions = Player.check_platform_collisions
+    landing_on = Player.landing_on
+    land = Player.land
+    jump = Player.jump
+
+class PlayerArrays(EntityArrays):
+    columns = (("x", np.float64), ("y", np.float64), ("vel_x", np.float64), ("vel_y", np.float64),
+               ("is_jumping", np.bool_), ("can_double_jump", np.bool_),
+               ("has_wings", np.bool_), ("slow_time", np.bool_), ("magnet", np.bool_),
+               ("facing_right", np.bool_), ("current_frame", np.int32),
+               ("animation_timer", np.int32)) if np is not None else ()
+    view_class = PlayerView
+
+    def __init__(self, count):
+        super().__init__(capacity=count)
+        for _ in range(count):
+            self.append()
+
+    def reset(self, index, x, y):
+        # Same starting state as a freshly built Player
+        for name, _ in self.columns:
+            getattr(self, name)[index] = 0
+        self.x[index] = x
+        self.y[index] = y
+        self.facing_right[index] = True
+        self.sync_rects([index])
+
+    def sync_rects(self, indices=None):
+        if indices is None:
+            indices = range(self.count)
+        for index in indices:
+            self.views[index].rect.topleft = (int(self.x[index]), int(self.y[index]))
+
+    def apply_input(self, directions, jumps):
+        # Batched Player.jump and Game.move_player
+        jumps = np.asarray(jumps, dtype=bool)
+        directions = np.asarray(directions)
+        is_jumping = self.column("is_jumping")
+        can_double_jump = self.column("can_double_jump")
+        first_jump = jumps & ~is_jumping
+        double_jump = jumps & is_jumping & can_double_jump
+        self.column("vel_y")[first_jump | double_jump] = JUMP_FORCE
+        is_jumping[first_jump] = True
+        can_double_jump[double_jump] = False
+
+        vel_x = self.column("vel_x")
+        vel_x[:] = np.where(directions < 0, -PLAYER_SPEED,
+                            np.where(directions > 0, PLAYER_SPEED, vel_x * 0.9))
+
+    def move(self, wind_force, time_factor):
+        # Batched Player.move
+        x, y = self.column("x"), self.column("y")
+        vel_x, vel_y = self.column("vel_x"), self.column("vel_y")
+        vel_y += GRAVITY * time_factor
+        vel_x += wind_force * time_factor
+        vel_x *= 0.9
+        x += vel_x
+        y += vel_y
+
+        facing_right = self.column("facing_right")
+        facing_right[vel_x > 0.5] = True
+        facing_right[vel_x < -0.5] = False
+
+        animation_timer = self.column("animation_timer")
+        current_frame = self.column("current_frame")
+        animation_timer += 1
+        tick = animation_timer >= PlayerView.animation_speed
+        animation_timer[tick] = 0
+        walking = tick & (np.abs(vel_x) > 0.5)
+        current_frame[walking] = (current_frame[walking] + 1) % 3
+        current_frame[tick & ~walking] = 0
+        current_frame[self.column("is_jumping")] = 3
+
+        left = x < 0
+        right = x > SCREEN_WIDTH - PlayerView.width
+        x[left] = 0
+        x[right] = SCREEN_WIDTH - PlayerView.width
+        vel_x[left | right] = 0
+        self.sync_rects()
+
+class BatchGame:
+    def __init__(self, world_count, vectorized=False, seed=None, score_store=None):
+        if np is None:
+            raise RuntimeError("BatchGame requires NumPy")
+        self.players = PlayerArrays(world_count)
+        # World i is seeded with seed + i, so each world is reproducible on its own
+        self.worlds = [Game(headless=True, vectorized=vectorized,
+                            seed=None if seed is None else seed + index)
+                       for index in range(world_count)]
+        self.frames = np.zeros(world_count, dtype=np.int64)
+        self.episodes = 0
+        self.finished = []
+        # Finished episodes are saved here in one batch per step
+        self.score_store = score_store
+        for index in range(world_count):
+            self.reset_world(index)
+
+    def __len__(self):
+        return len(self.worlds)
+
+    def reset_world(self, index):
+        game = self.worlds[index]
+        game.reset_game()
+        self.players.reset(index, game.player.x, game.player.y)
+        game.player = self.players.views[index]
+        self.frames[index] = 0
+
+    def step(self, actions):
+        # actions: (world_count, 2) array-like of (direction, jump) per world.
+        # Returns (scores, done); finished worlds are reset automatically and
+        # their final results appended to self.finished.
+        actions = np.asarray(actions)
+        players = self.players
+        worlds = self.worlds
+        players.apply_input(actions[:, 0], actions[:, 1])
+
+        time_factor = np.where(players.column("slow_time"), 0.5, 1.0)
+        time_factors = time_factor.tolist()
+        for game, world_time_factor in zip(worlds, time_factors):
+            game.run_events(world_time_factor)
+
+        wind_force = np.array([game.wind_force if game.wind_active else 0 for game in worlds])
+        players.move(wind_force, time_factor)
+        for game in worlds:
+            game.player.check_platform_collisions(game.platform_index)
+
+        for game, world_time_factor in zip(worlds, time_factors):
+            game.update_world(world_time_factor)
+        self.frames += 1
+
+        scores = np.array([game.score for game in worlds])
+        done = np.array([game.game_over for game in worlds])
+        finished = []
+        for index in np.flatnonzero(done):
+            game = worlds[index]
+            finished.append(dict(game.run_stats(), world=int(index), frames=int(self.frames[index])))
+            self.episodes += 1
+            self.reset_world(index)
+        self.finished.extend(finished)
+        if self.score_store is not None:
+            self.score_store.record_many(finished)
+        return scores, done
+
+def random_actions(rng, world_count):
+    return np.stack([rng.integers(-1, 2, world_count), rng.random(world_count) < 0.1], axis=1)
+
+def check(world_count, steps, vectorized=False):
+    # Steps a BatchGame next to one plain Game per world, built on the same
+    # seed and fed the same inputs, and counts the world-steps where the
+    # player or score differ. Both reset the same way when a run ends, so
+    # the comparison carries on across episodes.
+    batch = BatchGame(world_count, vectorized=vectorized, seed=0)
+    games = [Game(headless=True, vectorized=vectorized, seed=world.seed) for world in batch.worlds]
+    rng = np.random.default_rng(0)
+    mismatches = 0
+    for _ in range(steps):
+        actions = random_actions(rng, world_count)
+        scores, done = batch.step(actions)
+        for index, (game, (direction, jump)) in enumerate(zip(games, actions.tolist())):
+            game.apply_input(direction, bool(jump))
+            game.update()
+            if game.game_over != done[index]:
+                mismatches += 1
+            elif game.game_over:
+                game.reset_game()
+            else:
+                player = batch.worlds[index].player
+                mismatches += (game.player.x, game.player.y, game.score) != (player.x, player.y, scores[index])
+    return batch, mismatches
+
+def main(argv):
+    if argv and argv[0] == "--check":
+        vectorized = "--vectorized" in argv
+        argv = [arg for arg in argv[1:] if arg != "--vectorized"]
+        world_count = int(argv[0]) if len(argv) > 0 else 16
+        steps = int(argv[1]) if len(argv) > 1 else 500
+        batch, mismatches = check(world_count, steps, vectorized)
+        print(f"{world_count * steps} world-steps checked, {batch.episodes} episodes, {mismatches} mismatched")
+        return 1 if mismatches else 0
+
+    world_count = int(argv[0]) if len(argv) > 0 else 256
+    steps = int(argv[1]) if len(argv) > 1 else 1000
+    batch = BatchGame(world_count)
+    rng = np.random.default_rng()
+    start = time.perf_counter()
+    for _ in range(steps):
+        batch.step(random_actions(rng, world_count))
+    elapsed = time.perf_counter() - start
+    print(f"Worlds: {world_count}  Steps: {steps}  Episodes: {batch.episodes}  "
+          f"World-steps/sec: {world_count * steps / elapsed:.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,211 @@
+# Frame-cost benchmarks for the headless simulation and the HUD, plus a
+# seeded suite whose results can be saved as a baseline and compared against
+#
+#   python benchmark.py [--vectorized] [platform_count ...]
+#   python benchmark.py --hud
+#   python benchmark.py --suite [--save baseline.json] [--compare baseline.json [--tolerance 0.25]]
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+# Rendering benchmarks draw into SDL's offscreen dummy display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from tower_jumper import np, Game, Platform, SCREEN_WIDTH, SCREEN_HEIGHT
+
+DEFAULT_WORLD_SIZES = [100, 1000, 5000, 20000]
+FRAMES_PER_SIZE = 300
+BENCH_SEED = 1234  # every suite benchmark builds its worlds from this seed
+SUITE_WORLD_SIZES = [100, 1000, 5000]
+SUITE_REPEATS = 3  # each benchmark reports the best of this many runs
+LOOKAHEAD_SCREENS = 50
+DENSE_PLATFORMS = 2000
+DEFAULT_TOLERANCE = 0.25  # allowed slowdown against the baseline
+
+def build_world(platform_count, vectorized=False, seed=BENCH_SEED):
+    game = Game(headless=True, vectorized=vectorized, seed=seed)
+    # Hold off tower quakes so the idle player stays on the start platform
+    game.events.cancel("quake_start")
+    
+    # Generate look-ahead above the camera until the world is big enough
+    camera_y = game.camera_y
+    while len(game.platforms) < platform_count:
+        game.camera_y -= SCREEN_HEIGHT
+        game.generate_platforms_above()
+    game.camera_y = camera_y
+    return game
+
+def time_update(game, frames):
+    frames_run = 0
+    start = time.perf_counter()
+    while frames_run < frames and not game.game_over:
+        game.update()
+        frames_run += 1
+    elapsed = time.perf_counter() - start
+    return elapsed / max(frames_run, 1), frames_run
+
+def bench_update(world_sizes, frames=FRAMES_PER_SIZE, vectorized=False):
+    results = []
+    for size in world_sizes:
+        game = build_world(size, vectorized)
+        entities = (len(game.platforms), len(game.powerups), len(game.hazards))
+        frame_time, frames_run = time_update(game, frames)
+        results.append((size, entities, frame_time, frames_run))
+    return results
+
+def bench_hud(frames=FRAMES_PER_SIZE):
+    # Game.draw_hud with the text cache and overlay reused, versus re-rendering
+    # every string and rebuilding the overlay each frame as draw() used to
+    game = Game(seed=0)
+    results = []
+    for game_over in (False, True):
+        game.game_over = game_over
+        for cached in (True, False):
+            start = time.perf_counter()
+            for _ in range(frames):
+                if not cached:
+                    game.text_cache.clear()
+                    game.overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+                    game.overlay.fill((0, 0, 0, 128))
+                game.draw_hud()
+            results.append((game_over, cached, (time.perf_counter() - start) / frames))
+    return results
+
+def best_of(run, repeats=SUITE_REPEATS):
+    # run() returns seconds per operation; the fastest repeat is the least
+    # disturbed by whatever else the machine was doing
+    return min(run() for _ in range(repeats))
+
+def bench_generation(screens=LOOKAHEAD_SCREENS, vectorized=False):
+    # One generate_platforms_above call filling a long look-ahead above a
+    # fresh tower
+    def run():
+        game = Game(headless=True, vectorized=vectorized, seed=BENCH_SEED)
+        game.camera_y -= screens * SCREEN_HEIGHT
+        start = time.perf_counter()
+        game.generate_platforms_above()
+        return time.perf_counter() - start
+    return best_of(run)
+
+def bench_collisions(platform_count=DENSE_PLATFORMS, checks=5000, vectorized=False):
+    # Player.check_platform_collisions against a band of tightly packed
+    # platforms, from fixed positions inside the band
+    game = Game(headless=True, vectorized=vectorized, seed=BENCH_SEED)
+    rng = random.Random(BENCH_SEED)
+    for _ in range(platform_count):
+        width = rng.randint(60, 150)
+        game.add_platform(Platform(rng.randint(0, SCREEN_WIDTH - width), rng.randint(-2000, 0), width))
+    positions = [(rng.randint(0, SCREEN_WIDTH - 30), rng.randint(-2050, -50)) for _ in range(checks)]
+    player = game.player
+    
+    def run():
+        start = time.perf_counter()
+        for x, y in positions:
+            player.x, player.y, player.vel_y = x, y, 5
+            player.rect.topleft = (x, y)
+            player.check_platform_collisions(game.platform_index)
+        return (time.perf_counter() - start) / checks
+    return best_of(run)
+
+def bench_draw(dirty_rects=False, frames=FRAMES_PER_SIZE):
+    # Game.draw under the dummy video driver; the simulation steps between
+    # draws are not timed
+    def run():
+        game = Game(seed=BENCH_SEED, dirty_rects=dirty_rects)
+        game.events.cancel("quake_start")
+        elapsed = 0
+        for _ in range(frames):
+            game.update()
+            start = time.perf_counter()
+            game.draw()
+            elapsed += time.perf_counter() - start
+        return elapsed / frames
+    return best_of(run)
+
+def run_suite():
+    # Benchmark name -> milliseconds per operation (lower is better)
+    backends = [("objects", False)] + ([("vectorized", True)] if np is not None else [])
+    results = {}
+    for backend, vectorized in backends:
+        for size in SUITE_WORLD_SIZES:
+            def run():
+                return time_update(build_world(size, vectorized), FRAMES_PER_SIZE)[0]
+            results[f"update/{backend}/{size}"] = best_of(run)
+        results[f"generation/{backend}/{LOOKAHEAD_SCREENS}_screens"] = bench_generation(vectorized=vectorized)
+        results[f"collisions/{backend}/{DENSE_PLATFORMS}"] = bench_collisions(vectorized=vectorized)
+    results["draw/full"] = bench_draw()
+    results["draw/dirty_rects"] = bench_draw(dirty_rects=True)
+    return {name: seconds * 1000 for name, seconds in results.items()}
+
+def suite_report(results):
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "numpy": np.__version__ if np is not None else None,
+        "machine": platform.platform(),
+        "seed": BENCH_SEED,
+        "results_ms": results,
+    }
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    # Returns the names of benchmarks that got slower than the baseline by
+    # more than the tolerance; benchmarks missing on either side are skipped
+    regressions = []
+    print(f"{'benchmark':<36} {'baseline':>9} {'current':>9} {'change':>8}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<36} {'-':>9} {current:>9.4f} {'new':>8}")
+            continue
+        change = current / previous - 1 if previous > 0 else 0.0
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<36} {previous:>9.4f} {current:>9.4f} {change:>+8.1%}{flag}")
+    return regressions
+
+def option(argv, name, default=None):
+    return argv[argv.index(name) + 1] if name in argv else default
+
+def main(argv):
+    if "--suite" in argv:
+        results = run_suite()
+        baseline_path = option(argv, "--compare")
+        if baseline_path is None:
+            for name, milliseconds in results.items():
+                print(f"{name:<36} {milliseconds:>9.4f} ms")
+        save_path = option(argv, "--save")
+        if save_path is not None:
+            with open(save_path, "w") as file:
+                json.dump(suite_report(results), file, indent=2)
+        if baseline_path is not None:
+            with open(baseline_path) as file:
+                baseline = json.load(file)["results_ms"]
+            tolerance = float(option(argv, "--tolerance", DEFAULT_TOLERANCE))
+            regressions = compare(results, baseline, tolerance)
+            if regressions:
+                print(f"{len(regressions)} benchmark(s) slower than the baseline by more than {tolerance:.0%}")
+                return 1
+        return 0
+    
+    if "--hud" in argv:
+        print(f"{'screen':>10} {'cached':>7} {'ms/frame':>9}")
+        for game_over, cached, frame_time in bench_hud():
+            screen = "game over" if game_over else "playing"
+            print(f"{screen:>10} {'yes' if cached else 'no':>7} {frame_time * 1000:>9.3f}")
+        return
+    
+    vectorized = "--vectorized" in argv
+    world_sizes = [int(arg) for arg in argv if not arg.startswith("--")] or DEFAULT_WORLD_SIZES
+    print(f"{'platforms':>10} {'powerups':>9} {'hazards':>8} {'ms/frame':>9} {'frames':>7}")
+    for size, (platforms, powerups, hazards), frame_time, frames_run in bench_update(world_sizes, vectorized=vectorized):
+        print(f"{platforms:>10} {powerups:>9} {hazards:>8} {frame_time * 1000:>9.3f} {frames_run:>7}")
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,169 @@
+# Gym-style environment around one headless Game, with fixed-size NumPy
+# observations so bots can be trained without rendering a single frame.
+#
+#   env = TowerJumperEnv()
+#   observation = env.reset(seed=0)
+#   observation, reward, done, info = env.step(action)
+#
+#   python env.py [steps]
+import sys
+import time
+
+from tower_jumper import (
+    np, Game, HAZARD_KINDS, SCREEN_WIDTH, SCREEN_HEIGHT, JUMP_FORCE, WIND_FORCE,
+)
+
+# Discrete action space: index -> (direction, jump)
+ACTIONS = ((0, False), (-1, False), (1, False), (0, True), (-1, True), (1, True))
+
+PLATFORM_SLOTS = 8  # nearest platforms in each observation
+HAZARD_SLOTS = 4
+POWERUP_SLOTS = 4
+PLAYER_FEATURES = 10
+ENTITY_FEATURES = 5  # present, dx, dy, extent or speed, kind
+WORLD_FEATURES = 4
+OBSERVATION_SIZE = (PLAYER_FEATURES + WORLD_FEATURES +
+                    (PLATFORM_SLOTS + HAZARD_SLOTS + POWERUP_SLOTS) * ENTITY_FEATURES)
+
+class TowerJumperEnv:
+    def __init__(self, vectorized=False, max_steps=20000, death_penalty=10.0):
+        if np is None:
+            raise RuntimeError("TowerJumperEnv requires NumPy")
+        self.game = Game(headless=True, vectorized=vectorized)
+        self.max_steps = max_steps
+        self.death_penalty = death_penalty
+        self.steps = 0
+        self.last_score = 0
+        # Features are written into a reused list and copied into the reused
+        # observation array in one go; copy the array to keep an observation
+        # past the next step() call
+        self.values = [0.0] * OBSERVATION_SIZE
+        self.observation = np.zeros(OBSERVATION_SIZE, dtype=np.float32)
+        slots = max(PLATFORM_SLOTS, HAZARD_SLOTS, POWERUP_SLOTS)
+        self.chosen = [None] * slots
+        self.distances = [0.0] * slots
+
+    def reset(self, seed=None):
+        self.game.reset_game(seed)
+        self.steps = 0
+        self.last_score = 0
+        return self.observe()
+
+    def step(self, action):
+        # action: an index into ACTIONS or a (direction, jump) pair
+        direction, jump = ACTIONS[action] if isinstance(action, (int, np.integer)) else action
+        game = self.game
+        game.apply_input(direction, jump)
+        game.update()
+        self.steps += 1
+
+        reward = game.score - self.last_score
+        self.last_score = game.score
+        if game.death_cause is not None:
+            reward -= self.death_penalty
+        truncated = self.steps >= self.max_steps and game.death_cause is None
+        done = game.death_cause is not None or truncated
+        info = {"score": game.score, "cause": game.death_cause, "truncated": truncated}
+        return self.observe(), float(reward), done, info
+
+    def observe(self):
+        game = self.game
+        player = game.player
+        values = self.values
+        values[0] = player.rect.x / SCREEN_WIDTH
+        values[1] = (player.rect.y - game.camera_y) / SCREEN_HEIGHT
+        values[2] = player.vel_x / -JUMP_FORCE
+        values[3] = player.vel_y / -JUMP_FORCE
+        values[4] = player.is_jumping
+        values[5] = player.can_double_jump
+        values[6] = player.has_wings
+        values[7] = player.slow_time
+        values[8] = player.magnet
+        values[9] = player.facing_right
+        values[10] = game.wind_active
+        values[11] = game.wind_force / WIND_FORCE
+        values[12] = game.quake_active
+        values[13] = game.quake_intensity / 5
+
+        start = PLAYER_FEATURES + WORLD_FEATURES
+        start = self.nearest(game.platforms, PLATFORM_SLOTS, start, platform_features)
+        start = self.nearest(game.hazards, HAZARD_SLOTS, start, hazard_features)
+        self.nearest(game.powerups, POWERUP_SLOTS, start, powerup_features)
+        self.observation[:] = values
+        return self.observation
+
+    def nearest(self, entities, slots, start, features):
+        # Write the entities whose centers are closest to the player's,
+        # nearest first, as (present, dx, dy, extent or speed, kind) relative
+        # to the player's rect, zero-filling unused slots. The selection is
+        # an insertion into the reused chosen/distances lists, so a step
+        # allocates nothing here. Returns the next free index.
+        rect = self.game.player.rect
+        left, bottom = rect.x, rect.bottom
+        center_x, center_y = rect.centerx, rect.centery
+        chosen = self.chosen
+        distances = self.distances
+        count = 0
+        for entity in entities:
+            dx = entity.x + entity.width / 2 - center_x
+            dy = entity.y + entity.height / 2 - center_y
+            distance = dx * dx + dy * dy
+            if count == slots:
+                if distance >= distances[slots - 1]:
+                    continue
+                slot = slots - 1
+            else:
+                slot = count
+                count += 1
+            # Ties keep the earlier entity first
+            while slot and distances[slot - 1] > distance:
+                distances[slot] = distances[slot - 1]
+                chosen[slot] = chosen[slot - 1]
+                slot -= 1
+            distances[slot] = distance
+            chosen[slot] = entity
+
+        values = self.values
+        index = start
+        for slot in range(count):
+            entity = chosen[slot]
+            chosen[slot] = None
+            extent, kind = features(entity)
+            values[index] = 1.0
+            values[index + 1] = (entity.x - left) / SCREEN_WIDTH
+            values[index + 2] = (entity.y - bottom) / SCREEN_HEIGHT
+            values[index + 3] = extent / SCREEN_WIDTH
+            values[index + 4] = kind
+            index += ENTITY_FEATURES
+        end = start + slots * ENTITY_FEATURES
+        for index in range(index, end):
+            values[index] = 0.0
+        return end
+
+def platform_features(platform):
+    return platform.width, platform.platform_type.value
+
+def hazard_features(hazard):
+    return hazard.speed, HAZARD_KINDS.index(hazard.hazard_type)
+
+def powerup_features(powerup):
+    return powerup.width, powerup.powerup_type.value
+
+def main(argv):
+    steps = int(argv[0]) if argv else 100000
+    env = TowerJumperEnv()
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    actions = rng.integers(len(ACTIONS), size=steps)
+    episodes = 0
+    start = time.perf_counter()
+    for action in actions.tolist():
+        _, _, done, _ = env.step(action)
+        if done:
+            episodes += 1
+            env.reset()
+    elapsed = time.perf_counter() - start
+    print(f"Steps: {steps}  Episodes: {episodes}  Steps/sec: {steps / elapsed:.0f}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,457 @@
+# Local multiplayer and ghost racing: several players climb one shared tower,
+# against bots and ghosts that replay recorded runs' inputs.
+#
+#   python race.py --players 2 [--bots 3] [--ghost runs/run-123.tjr ...]
+#   python race.py --headless --bots 8 [--frames 20000] [--vectorized]
+#   python race.py --check --bots 8 [--frames 20000] [--vectorized]   # exits 1 on a mismatch
+import argparse
+import math
+import random
+import sys
+import time
+from functools import partial
+
+import pygame
+
+from tower_jumper import (
+    np, Game, Player, Replay, ScriptedInput, ScoreStore, climber_input, idle_input,
+    sprite_cache, prepare_surface, swept_landing, TextCache, powerup_pool, hazard_pool,
+    SCREEN_HEIGHT, SCROLL_THRESHOLD, PLAYER_START, FPS,
+)
+
+GHOST_ALPHA = 110
+# Left, right and jump keys of each local player
+KEY_SETS = (((pygame.K_LEFT,), (pygame.K_RIGHT,), (pygame.K_UP, pygame.K_RSHIFT)),
+            ((pygame.K_a,), (pygame.K_d,), (pygame.K_w, pygame.K_SPACE)))
+POWERUP_FLAGS = (("wings_end", "has_wings"), ("magnet_end", "magnet"), ("slow_time_end", "slow_time"))
+
+class KeyboardInput:
+    # Input source for one local player; jumps are queued by RaceGame's
+    # event handling and applied on the next step
+    def __init__(self, keys):
+        self.left_keys, self.right_keys, self.jump_keys = keys
+        self.pending_jump = False
+
+    def __call__(self, game, frame):
+        pressed = pygame.key.get_pressed()
+        if any(pressed[key] for key in self.left_keys):
+            direction = -1
+        elif any(pressed[key] for key in self.right_keys):
+            direction = 1
+        else:
+            direction = 0
+        jump = self.pending_jump
+        self.pending_jump = False
+        return direction, jump
+
+class Racer:
+    # One Player in a race and the input source driving it, called like a
+    # headless input source with the race as the game
+    def __init__(self, name, input_source=idle_input, replay=None):
+        self.name = name
+        self.input_source = input_source
+        # Ghosts replay a recorded run's inputs: drawn translucent and never
+        # followed by the camera while a live player is in the race
+        self.replay = replay
+        self.ghost = replay is not None
+        self.player = None  # built by spawn() when the racer joins a race
+        self.top_y = None  # highest point this racer has reached
+        self.index = None
+        self.score = 0
+        self.death_cause = None
+
+    def spawn(self):
+        # RaceGame calls this once its display is open, so the player and
+        # ghost sprites go into the shared sprite cache converted to the
+        # display's format
+        self.player = Player(*PLAYER_START)
+        if self.ghost:
+            self.player.frames_right, self.player.frames_left = sprite_cache.get(
+                ("ghost", self.player.width, self.player.height), render_ghost_frames)
+        self.reset()
+
+    def reset(self):
+        self.player.reset(*PLAYER_START)
+        self.top_y = self.player.y
+        self.score = 0
+        self.death_cause = None
+
+def render_ghost_frames(width, height):
+    player = Player(0, 0)
+    ghost_frames = []
+    for frames in (player.frames_right, player.frames_left):
+        faded = [frame.copy() for frame in frames]
+        for frame in faded:
+            frame.set_alpha(GHOST_ALPHA)
+        ghost_frames.append([prepare_surface(frame) for frame in faded])
+    return tuple(ghost_frames)
+
+class RaceGame(Game):
+    # A Game whose world is shared by every racer. All falling racers land
+    # through one batched swept test per step, the camera and culling follow
+    # the lowest racer still climbing, and the tower is generated ahead of
+    # the leader. self.player is the followed racer's player, except while
+    # inputs are gathered, when each racer's source sees its own.
+    def __init__(self, racers, headless=False, vectorized=False, seed=None, profile=False,
+                 score_store=None, offscreen=False):
+        if np is None:
+            raise RuntimeError("RaceGame requires NumPy")
+        # Ghosts only replay their runs in the tower they were recorded in
+        ghost_seeds = {racer.replay.seed for racer in racers if racer.ghost}
+        if len(ghost_seeds) > 1:
+            raise ValueError("ghost replays were recorded in different towers")
+        self.ghost_seed = ghost_seeds.pop() if ghost_seeds else None
+        if self.ghost_seed is not None:
+            seed = self.ghost_seed
+        super().__init__(headless=headless, vectorized=vectorized, seed=seed, profile=profile,
+                         score_store=score_store, offscreen=offscreen)
+        self.racers = racers
+        self.racer_of = {}
+        for index, racer in enumerate(racers):
+            racer.index = index
+            racer.spawn()
+            self.racer_of[racer.player] = racer
+            for event, flag in POWERUP_FLAGS:
+                self.event_handlers[f"{event}:{index}"] = partial(self.end_powerup, flag, racer.player)
+        # The race is over once every followed racer is out
+        self.followed = [racer for racer in racers if not racer.ghost] or list(racers)
+        self.player = self.followed[0].player
+        self.frames = 0
+        self.keyboard_inputs = [racer.input_source for racer in racers
+                                if isinstance(racer.input_source, KeyboardInput)]
+        self.name_cache = None if headless else TextCache(pygame.font.SysFont(None, 20))
+
+    def reset_game(self, seed=None):
+        if self.ghost_seed is not None:
+            seed = self.ghost_seed
+        super().reset_game(seed)
+        for racer in self.racers:
+            racer.reset()
+        self.player = self.followed[0].player
+        self.frames = 0
+
+    def active_racers(self):
+        return [racer for racer in self.racers if racer.death_cause is None]
+
+    def powerup_event(self, name, player):
+        return f"{name}:{self.racer_of[player].index}"
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE and self.death_cause is None:
+                    self.game_over = not self.game_over  # Toggle pause
+                elif event.key == pygame.K_r and self.game_over:
+                    self.reset_game()
+                elif event.key == pygame.K_F3 and self.profiler is not None:
+                    self.show_profile = not self.show_profile
+                elif not self.game_over:
+                    for keyboard in self.keyboard_inputs:
+                        if event.key in keyboard.jump_keys:
+                            keyboard.pending_jump = True
+
+    def handle_input(self):
+        self.gather_input()
+
+    def gather_input(self):
+        # Every active racer's source picks and applies its input against its
+        # own player, the way a single Game's input source would
+        if self.game_over:
+            return
+        followed = self.player
+        for racer in self.active_racers():
+            self.player = racer.player
+            direction, jump = racer.input_source(self, self.frames)
+            self.apply_input(direction, jump)
+        self.player = followed
+
+    def step(self):
+        # Headless equivalent of one pass of the frame loop
+        self.gather_input()
+        self.update()
+
+    def update(self):
+        if self.game_over:
+            return
+        active = self.active_racers()
+
+        # Slow time slows the shared world for everyone
+        time_factor = 0.5 if any(racer.player.slow_time for racer in active) else 1.0
+        self.run_events(time_factor)
+        self.lap("tower")
+
+        wind_force = self.wind_force if self.wind_active else 0
+        for racer in active:
+            racer.player.move(wind_force, time_factor)
+        self.land_falling([racer.player for racer in active if racer.player.vel_y > 0])
+        self.lap("player")
+
+        self.update_world(time_factor)
+        self.frames += 1
+
+    def land_falling(self, players):
+        for player, landing in zip(players, self.landings(players)):
+            if landing is not None:
+                player.land(landing)
+
+    def landings(self, players):
+        # Player.landing_on for all falling players at once: one band query
+        # covers every player's landing window and swept_landing runs on a
+        # (players x platforms) grid. Returns each player's platform or None.
+        if not players:
+            return []
+        missed = [None] * len(players)
+        # One row per player: bottom, vel_y, vel_x, left, width
+        state = np.array([(player.rect.bottom, player.vel_y, player.vel_x, player.rect.left, player.width)
+                          for player in players], dtype=np.float64)
+        bottom, vel_y = state[:, 0], state[:, 1]
+        band_top = math.floor((bottom - vel_y).min()) - 10
+        band_bottom = int(bottom.max())
+        if self.world is not None:
+            arrays = self.world.platforms
+            y = arrays.column("y")
+            rows = np.flatnonzero((y >= band_top) & (y < band_bottom + 1))
+            if not len(rows):
+                return missed
+            candidates = [arrays.views[row] for row in rows]
+            top = y[rows].astype(np.int64)
+            platform_left = arrays.column("x")[rows].astype(np.int64)
+            platform_right = platform_left + arrays.column("width")[rows]
+        else:
+            candidates = list(self.platform_index.query(band_top, band_bottom))
+            if not candidates:
+                return missed
+            top, platform_left, platform_right = np.array(
+                [(platform.rect.top, platform.rect.left, platform.rect.right) for platform in candidates],
+                dtype=np.int64).T
+
+        bottom, vel_y, vel_x, left, width = state.T[:, :, None]
+        hits = swept_landing(bottom, vel_y, vel_x, left, width, top, platform_left, platform_right,
+                             np.maximum)
+
+        # Earliest top crossed wins; ties go to the first candidate, as in
+        # the single-player scan
+        tops = np.where(hits, top, np.iinfo(np.int64).max)
+        landings = tops.argmin(axis=1)
+        return [candidates[landing] if hit else None
+                for hit, landing in zip(hits.any(axis=1).tolist(), landings.tolist())]
+
+    def update_world(self, time_factor):
+        active = self.active_racers()
+
+        # Camera and culling follow the lowest racer still climbing, so
+        # nobody is left behind below the screen by the leader
+        followed = [racer for racer in self.followed if racer.death_cause is None]
+        self.player = max(followed, key=lambda racer: racer.player.y).player
+        if self.player.y < self.camera_y + SCROLL_THRESHOLD:
+            self.camera_y = self.player.y - SCROLL_THRESHOLD
+        cull_y = self.camera_y + SCREEN_HEIGHT + 100
+
+        self.update_platforms(cull_y)
+        self.lap("platforms")
+
+        # The tower has to keep ahead of the leader, who may be off screen
+        leader_y = min(racer.player.y for racer in active)
+        self.generate_platforms_above(min(self.camera_y, leader_y - SCROLL_THRESHOLD))
+        self.lap("generation")
+
+        self.update_powerups(cull_y)
+        self.lap("powerups")
+        self.update_hazards(time_factor, cull_y)
+        self.lap("hazards")
+
+        for racer in active:
+            player = racer.player
+            if player.y < racer.top_y:
+                racer.top_y = player.y
+            height_score = max(0, int((player.score - player.y) / 10))
+            if height_score > racer.score:
+                racer.score = height_score
+            if racer.death_cause is None and player.y > self.camera_y + SCREEN_HEIGHT:
+                racer.death_cause = "fell"
+        self.score = max(racer.score for racer in self.racers)
+
+        # The race ends with the last followed racer
+        if all(racer.death_cause is not None for racer in followed):
+            self.game_over = True
+            self.death_cause = max(followed, key=lambda racer: racer.score).death_cause
+            self.finish_run()
+
+    def update_powerups(self, cull_y):
+        # A powerup goes to the first active racer touching it
+        active = self.active_racers()
+        if self.world is not None:
+            for racer in active:
+                for powerup in self.world.powerups.touching(racer.player.rect, cull_y):
+                    if not powerup.collected:
+                        self.apply_powerup(powerup, racer.player)
+                        powerup.collected = True
+            self.world.powerups.cull(cull_y)
+            return
+
+        rects = [racer.player.rect for racer in active]
+        powerups = self.powerups
+        kept = 0
+        for powerup in powerups:
+            if powerup.y > cull_y:
+                self.powerup_index.remove(powerup)
+                powerup_pool.release(powerup)
+                continue
+            touching = powerup.rect.collidelist(rects)
+            if not powerup.collected and touching != -1:
+                self.apply_powerup(powerup, active[touching].player)
+                powerup.collected = True
+                self.powerup_index.remove(powerup)
+                powerup_pool.release(powerup)
+                continue
+            powerups[kept] = powerup
+            kept += 1
+        del powerups[kept:]
+
+    def update_hazards(self, time_factor, cull_y):
+        # A hazard knocks out every racer it touches
+        active = self.active_racers()
+        if self.world is not None:
+            self.world.hazards.update(time_factor)
+            self.world.hazards.cull(cull_y)
+            for racer in active:
+                hazard = self.world.hazards.touching(racer.player.rect)
+                if hazard is not None:
+                    racer.death_cause = hazard.hazard_type
+            return
+
+        rects = [racer.player.rect for racer in active]
+        hazards = self.hazards
+        kept = 0
+        for hazard in hazards:
+            hazard.update(time_factor)
+            if hazard.y > cull_y:
+                hazard_pool.release(hazard)
+                continue
+            for touching in hazard.rect.collidelistall(rects):
+                active[touching].death_cause = hazard.hazard_type
+            hazards[kept] = hazard
+            kept += 1
+        del hazards[kept:]
+
+    def racer_stats(self, racer):
+        return {
+            "seed": self.seed,
+            "score": racer.score,
+            "height": max(0, int(PLAYER_START[1] - racer.top_y)),
+            "cause": racer.death_cause,
+            "duration": self.events.now / FPS,
+        }
+
+    def finish_run(self):
+        # Every racer but the ghosts gets a run in the score store
+        if self.score > self.high_score:
+            self.high_score = self.score
+        if self.score_store is not None:
+            self.score_store.record_many(self.racer_stats(racer) for racer in self.racers
+                                         if not racer.ghost)
+
+    def draw_players(self):
+        # Ghosts first, so live players are drawn over them
+        camera_y = self.camera_y
+        for racer in sorted(self.active_racers(), key=lambda racer: not racer.ghost):
+            player = racer.player
+            player.draw(self.screen, camera_y)
+            name = self.name_cache.render(racer.index, racer.name)
+            self.screen.blit(name, (int(player.x + player.width / 2 - name.get_width() / 2),
+                                    int(player.y - camera_y) - 26))
+
+    def hud_lines(self):
+        remaining = sum(racer.death_cause is None for racer in self.followed)
+        return super().hud_lines() + [("racers", f"Racers: {remaining}/{len(self.followed)}", (20, 100))]
+
+class CheckedRace(RaceGame):
+    # A race that also lands each falling racer on its own, through
+    # Player.landing_on, and counts the falls where that disagrees with the
+    # batched landings
+    def __init__(self, racers, **kwargs):
+        super().__init__(racers, **kwargs)
+        self.falls = 0
+        self.landed = 0
+        self.mismatches = 0
+
+    def land_falling(self, players):
+        batched = self.landings(players)
+        for player, landing in zip(players, batched):
+            self.falls += 1
+            self.landed += landing is not None
+            if player.landing_on(self.platform_index) is not landing:
+                self.mismatches += 1
+        super().land_falling(players)
+
+def check_landings(bots, frames, seed=None, vectorized=False):
+    # Climber bots, plus as many bots steering and jumping at random so
+    # falls land on every part of a platform. Returns the finished race.
+    rng = random.Random(seed)
+    racers = build_racers(0, bots)
+    racers += [Racer(f"Random {index + 1}", ScriptedInput(
+                   [(rng.choice((-1, 0, 1)), rng.random() < 0.1) for _ in range(FPS * 10)], loop=True))
+               for index in range(bots)]
+    game = CheckedRace(racers, headless=True, vectorized=vectorized, seed=seed)
+    for _ in range(frames):
+        game.step()
+        if game.game_over:
+            game.reset_game()
+    return game
+
+def build_racers(players=1, bots=0, ghost_paths=()):
+    racers = [Racer(f"P{index + 1}", KeyboardInput(KEY_SETS[index])) for index in range(players)]
+    racers += [Racer(f"Bot {index + 1}", climber_input) for index in range(bots)]
+    for path in ghost_paths:
+        replay = Replay.load(path)
+        racers.append(Racer(f"Ghost {replay.score}", ScriptedInput(replay.actions()), replay))
+    return racers
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Race in one shared Tower Jumper tower")
+    parser.add_argument("--players", type=int, default=1, choices=range(len(KEY_SETS) + 1),
+                        help="local players (1: arrows, 2: WASD)")
+    parser.add_argument("--bots", type=int, default=0, help="climber bots to race against")
+    parser.add_argument("--ghost", action="append", default=[], help="replay file to race as a ghost")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--vectorized", action="store_true", help="use the NumPy world backend")
+    parser.add_argument("--headless", action="store_true", help="simulate bots and ghosts only, and time it")
+    parser.add_argument("--check", action="store_true",
+                        help="check batched landings against per-player ones; exits 1 on a mismatch")
+    parser.add_argument("--frames", type=int, default=20000, help="headless step count")
+    parser.add_argument("--scores", default=None, help="save finished races to this score database")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        game = check_landings(max(args.bots, 1), args.frames, args.seed, args.vectorized)
+        print(f"{game.falls} falls checked, {game.landed} landings, {game.mismatches} mismatched")
+        return 1 if game.mismatches else 0
+
+    racers = build_racers(0 if args.headless else args.players, args.bots, args.ghost)
+    if not racers:
+        parser.error("a race needs at least one player, bot or ghost")
+    store = ScoreStore(args.scores) if args.scores else None
+    if not args.headless:
+        game = RaceGame(racers, vectorized=args.vectorized, seed=args.seed, score_store=store)
+        game.run()
+        return 0
+
+    game = RaceGame(racers, headless=True, vectorized=args.vectorized, seed=args.seed, score_store=store)
+    races = 0
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        game.step()
+        if game.game_over:
+            races += 1
+            game.reset_game()
+    elapsed = time.perf_counter() - start
+    if store is not None:
+        store.close()
+    print(f"Racers: {len(racers)}  Steps: {args.frames}  Races: {races}  "
+          f"Steps/sec: {args.frames / elapsed:.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,118 @@
+# Replay playback: re-simulates recorded runs headlessly at full speed.
+#
+#   python replay.py play run.tjr [--render 0,120,600] [--out frames]
+#   python replay.py video run.tjr [--scale 2] [--every 1] [--out run.rgb]
+#   python replay.py check runs/*.tjr
+import argparse
+import os
+import sys
+import time
+
+# Replays render offscreen and never open a window; should anything still
+# initialize the display, keep it on SDL's dummy driver
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from tower_jumper import np, Game, Replay, FPS
+
+VIDEO_BATCH = 32  # frames gathered before each write to the video output
+
+def play(replay, render_frames=(), out_dir="."):
+    # Re-simulate the run; only the steps listed in render_frames are drawn
+    # and saved as PNGs. Returns the outcome of the re-simulated run.
+    render_frames = set(render_frames)
+    game = Game(headless=not render_frames, offscreen=bool(render_frames), seed=replay.seed)
+    start = time.perf_counter()
+    for frame, (direction, jump) in enumerate(replay.actions()):
+        game.apply_input(direction, jump)
+        game.update()
+        if frame in render_frames:
+            game.draw()
+            pygame.image.save(game.screen, os.path.join(out_dir, f"frame-{frame:06d}.png"))
+    elapsed = time.perf_counter() - start
+    return {
+        "steps": len(replay),
+        "score": game.score,
+        "game_over": game.game_over,
+        "cause": game.death_cause,
+        "steps_per_sec": len(replay) / elapsed if elapsed > 0 else float("inf"),
+    }
+
+def export_video(replay, output, scale=1, every=1, batch_size=VIDEO_BATCH):
+    # Write every `every`-th step as raw RGB24 frames, downscaled by
+    # `scale`, to the binary file object `output` (a file, or the stdin of
+    # an encoder). Frames are copied out of the game's frame buffer into one
+    # reused batch array, which is written straight from its memory.
+    # Returns the frame size as (width, height).
+    game = Game(offscreen=True, seed=replay.seed)
+    height, width, _ = game.frame(scale).shape
+    batch = np.empty((batch_size, height, width, 3), dtype=np.uint8)
+    filled = 0
+    for step, (direction, jump) in enumerate(replay.actions()):
+        game.apply_input(direction, jump)
+        game.update()
+        if step % every:
+            continue
+        game.draw()
+        np.copyto(batch[filled], game.frame(scale))
+        filled += 1
+        if filled == batch_size:
+            output.write(memoryview(batch))
+            filled = 0
+    if filled:
+        output.write(memoryview(batch[:filled]))
+    return width, height
+
+def check(paths):
+    # Re-simulate stored runs and report those whose final score no longer
+    # matches the recording, e.g. after a physics change
+    mismatches = 0
+    for path in paths:
+        replay = Replay.load(path)
+        result = play(replay)
+        if result["score"] != replay.score:
+            mismatches += 1
+            print(f"{path}: recorded score {replay.score}, replayed {result['score']}")
+    print(f"{len(paths)} replays checked, {mismatches} mismatched")
+    return mismatches
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Play back or check Tower Jumper replays")
+    commands = parser.add_subparsers(dest="command", required=True)
+    play_parser = commands.add_parser("play", help="re-simulate one replay")
+    play_parser.add_argument("path")
+    play_parser.add_argument("--render", default="", help="comma-separated steps to save as PNG")
+    play_parser.add_argument("--out", default=".", help="directory for rendered frames")
+    video_parser = commands.add_parser("video", help="export a replay as raw RGB24 video frames")
+    video_parser.add_argument("path")
+    video_parser.add_argument("--scale", type=int, default=1, help="keep every Nth pixel in each direction")
+    video_parser.add_argument("--every", type=int, default=1, help="keep every Nth simulation step")
+    video_parser.add_argument("--out", default="-", help="output file, or - for stdout")
+    check_parser = commands.add_parser("check", help="verify replays still reproduce")
+    check_parser.add_argument("paths", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        return 1 if check(args.paths) else 0
+    if args.command == "video":
+        replay = Replay.load(args.path)
+        if args.out == "-":
+            width, height = export_video(replay, sys.stdout.buffer, args.scale, args.every)
+        else:
+            with open(args.out, "wb") as output:
+                width, height = export_video(replay, output, args.scale, args.every)
+        # The encoder needs the frame geometry, e.g.
+        #   python replay.py video run.tjr | ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -r FPS -i - run.mp4
+        print(f"rawvideo rgb24 {width}x{height} at {FPS / args.every:g} fps", file=sys.stderr)
+        return 0
+    render_frames = [int(frame) for frame in args.render.split(",") if frame]
+    if render_frames:
+        os.makedirs(args.out, exist_ok=True)
+    result = play(Replay.load(args.path), render_frames, args.out)
+    print("Steps: {steps}  Score: {score}  Cause: {cause}  "
+          "Steps/sec: {steps_per_sec:.0f}".format(**result))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,76 @@
+# Multiprocess rollout runner: spreads headless episodes across all cores
+# and streams each result back to the parent as soon as it finishes.
+#
+#   python rollouts.py --episodes 1000 --seed 0 --frames 20000
+#   python rollouts.py --episodes 16 --min-height 500   # exits 1 if the bot stops climbing
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+
+# Results are streamed as JSON lines on stdout, so keep pygame's banner off it
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from tower_jumper import Game, HeadlessRunner, ScoreStore, climber_input
+
+def init_worker():
+    # Initializing SDL's display lets it trap SIGTERM, which would stop
+    # Pool.terminate() from shutting the worker down; headless workers never
+    # do, but keep the default handler regardless
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+def run_episode(task):
+    # Episode seeds are derived from the base seed, so a rollout reproduces
+    # exactly no matter which worker picks the episode up
+    episode, seed, max_frames, vectorized = task
+    game = Game(headless=True, vectorized=vectorized, seed=seed)
+    result = HeadlessRunner(game, climber_input).run(max_frames)
+    return dict(game.run_stats(), episode=episode, frames=result["frames"], worker=os.getpid())
+
+def run_rollouts(episodes, base_seed=0, max_frames=20000, processes=None, vectorized=False):
+    # Yields one result dict per episode, in completion order
+    tasks = [(episode, base_seed + episode, max_frames, vectorized) for episode in range(episodes)]
+    # Workers are spawned rather than forked so none inherit the parent's
+    # initialized SDL state
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes or os.cpu_count(), initializer=init_worker) as pool:
+        for result in pool.imap_unordered(run_episode, tasks):
+            yield result
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Run headless Tower Jumper episodes in parallel")
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="base seed; episode i uses seed + i")
+    parser.add_argument("--frames", type=int, default=20000, help="frame limit per episode")
+    parser.add_argument("--processes", type=int, default=None, help="worker count (default: all cores)")
+    parser.add_argument("--vectorized", action="store_true", help="use the NumPy world backend")
+    parser.add_argument("--scores", default=None, help="also save every episode to this score database")
+    parser.add_argument("--min-height", type=int, default=None,
+                        help="exit with status 1 if the mean height climbed is below this many px")
+    args = parser.parse_args(argv)
+
+    store = ScoreStore(args.scores) if args.scores else None
+    total_score = 0
+    total_height = 0
+    causes = {}
+    for result in run_rollouts(args.episodes, args.seed, args.frames, args.processes, args.vectorized):
+        print(json.dumps(result), flush=True)
+        if store is not None:
+            store.record(result)
+        total_score += result["score"]
+        total_height += result["height"]
+        causes[result["cause"]] = causes.get(result["cause"], 0) + 1
+    if store is not None:
+        store.close()
+    mean_height = total_height / max(args.episodes, 1)
+    print(f"Episodes: {args.episodes}  Mean score: {total_score / max(args.episodes, 1):.1f}  "
+          f"Mean height: {mean_height:.0f}  Causes: {causes}", file=sys.stderr)
+    if args.min_height is not None and mean_height < args.min_height:
+        print(f"Mean height {mean_height:.0f} is below --min-height {args.min_height}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
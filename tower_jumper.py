@@ -3,22 +3,51 @@ import random
 import math
 import sys
 import os
+import time
+import json
+import struct
+import zlib
+import csv
+import heapq
+import queue
+import sqlite3
+import threading
+from array import array
+from collections import deque
+from functools import partial
 from enum import Enum
 
-# Initialize pygame
-pygame.init()
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for the vectorized world backend
+    np = None
+
+# Fonts are needed by any rendering Game; the display is only initialized
+# when Game opens a window, so headless and offscreen runs never touch SDL's
+# video driver
+pygame.font.init()
 
 # Constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-FPS = 60
+FPS = 60  # simulation steps per second; all timers are counted in steps
+MAX_STEPS_PER_FRAME = 5  # catch-up limit before the game slows down instead
 GRAVITY = 0.5
 JUMP_FORCE = -12
 PLAYER_SPEED = 5
+PLAYER_WIDTH = 30
 PLATFORM_SPEED = 2
+MOVE_DISTANCE = 100  # how far a moving platform travels either side of its start
 SCROLL_THRESHOLD = 200
 PLATFORM_GAP_MIN = 60
 PLATFORM_GAP_MAX = 120
+START_PLATFORM = (SCREEN_WIDTH // 2 - 50, SCREEN_HEIGHT - 50, 100)  # x, y, width
+PLAYER_START = (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100)  # player's top-left on the start platform
+TOWER_BASE_Y = SCREEN_HEIGHT - 150  # the tower's chunks stack upward from here
+CHUNK_HEIGHT = 1000  # vertical extent of one generated tower chunk
+CHUNK_PREFETCH = 2  # chunks built ahead of the one the camera needs next
+INDEX_BUCKET_HEIGHT = 100  # vertical band size of the entity indexes
+MAX_ENTITY_HEIGHT = 30  # tallest platform, powerup or hazard, for visibility tests
 QUAKE_INTERVAL_MIN = 10  # seconds
 QUAKE_INTERVAL_MAX = 15  # seconds
 QUAKE_DURATION = 2  # seconds
@@ -26,6 +55,12 @@ WIND_FORCE = 1.5
 WIND_DURATION = 5  # seconds
 WIND_INTERVAL_MIN = 8  # seconds
 WIND_INTERVAL_MAX = 20  # seconds
+QUAKE_EVENTS, WIND_EVENTS, POWERUP_EVENTS = range(3)  # firing order of events due together
+PROFILE_SECTIONS = ("events", "input", "tower", "player", "platforms", "generation",
+                    "powerups", "hazards", "draw")
+PROFILE_WINDOW = 300  # frames of timings behind the overlay's percentiles
+PROFILE_REFRESH = 30  # frames between overlay text updates
+PROFILE_HISTOGRAM_MS = 34  # frame-time histogram range, in 1 ms bins
 
 # Colors
 WHITE = (255, 255, 255)
@@ -96,39 +131,266 @@ class Button:
     def is_clicked(self, mouse_pos, mouse_click):
         return self.rect.collidepoint(mouse_pos) and mouse_click
 
+class SpriteCache:
+    # Process-wide cache of pre-rendered surfaces keyed by entity type, size
+    # and state, so drawing an entity is a single blit and nothing is
+    # re-rendered when a Player is rebuilt on restart
+    def __init__(self):
+        self.sprites = {}
+        
+    def get(self, key, render):
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.sprites[key] = render(*key[1:])
+        return sprite
+        
+    def solid(self, kind, width, height, color):
+        key = (kind, width, height, color)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((width, height))
+            sprite.fill(color)
+            sprite = self.sprites[key] = prepare_surface(sprite)
+        return sprite
+        
+    def clear(self):
+        self.sprites.clear()
+
+sprite_cache = SpriteCache()
+
+class TextCache:
+    # Rendered text per HUD slot; a slot is only re-rendered when the text
+    # shown in it changes
+    def __init__(self, font, color=WHITE):
+        self.font = font
+        self.color = color
+        self.slots = {}
+        
+    def render(self, slot, text):
+        cached = self.slots.get(slot)
+        if cached is not None and cached[0] == text:
+            return cached[1]
+        surface = self.font.render(text, True, self.color)
+        self.slots[slot] = (text, surface)
+        return surface
+        
+    def clear(self):
+        self.slots.clear()
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def timing_stats(values):
+    ordered = sorted(values)
+    return {
+        "p50": percentile(ordered, 0.5),
+        "p99": percentile(ordered, 0.99),
+        "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+class FrameProfiler:
+    # Lap timer for the frame's hot path: lap(section) charges the time since
+    # the previous lap to that section. Times are kept in milliseconds.
+    panel_rect = pygame.Rect(SCREEN_WIDTH - 290, 10, 280, 260)
+    
+    def __init__(self, keep_history=False):
+        self.samples = {name: deque(maxlen=PROFILE_WINDOW) for name in ("frame",) + PROFILE_SECTIONS}
+        # One row per frame, for export: every frame with keep_history,
+        # otherwise the last PROFILE_WINDOW
+        self.history = [] if keep_history else deque(maxlen=PROFILE_WINDOW)
+        self.counts = (0, 0, 0)  # platforms, powerups, hazards at the last frame
+        self.current = dict.fromkeys(PROFILE_SECTIONS, 0.0)
+        self.frame_start = self.last = time.perf_counter()
+        self.frames = 0
+        self.text_cache = None
+        self.panel_lines = []
+        self.panel_stats = {}
+        
+    def begin_frame(self):
+        self.frame_start = self.last = time.perf_counter()
+        
+    def lap(self, section):
+        now = time.perf_counter()
+        self.current[section] += now - self.last
+        self.last = now
+        
+    def end_frame(self, game):
+        frame_ms = (self.last - self.frame_start) * 1000
+        self.samples["frame"].append(frame_ms)
+        row = [self.frames, frame_ms]
+        for name in PROFILE_SECTIONS:
+            section_ms = self.current[name] * 1000
+            self.samples[name].append(section_ms)
+            row.append(section_ms)
+            self.current[name] = 0.0
+        self.counts = (len(game.platforms), len(game.powerups), len(game.hazards))
+        self.history.append(row + list(self.counts))
+        self.frames += 1
+        
+    def summary(self):
+        # Percentiles over the whole history when it is kept, otherwise over
+        # the last PROFILE_WINDOW frames
+        columns = list(zip(*self.history)) or [()] * (len(PROFILE_SECTIONS) + 5)
+        return {name: timing_stats(columns[index + 1])
+                for index, name in enumerate(("frame",) + PROFILE_SECTIONS)}
+        
+    def export(self, path):
+        # .csv: one row per frame in the history; .json: per-section summary
+        # and entity counts over it
+        header = ["frame", "frame_ms"] + [f"{name}_ms" for name in PROFILE_SECTIONS] + [
+            "platforms", "powerups", "hazards"]
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(header)
+                writer.writerows(self.history)
+        elif path.endswith(".json"):
+            counts = list(zip(*self.history))[-3:] if self.history else [()] * 3
+            report = {
+                "frames": self.frames,
+                "frames_summarized": len(self.history),
+                "timings_ms": self.summary(),
+                "entities": {kind: {"mean": sum(values) / len(values) if values else 0,
+                                    "max": max(values, default=0)}
+                             for kind, values in zip(header[-3:], counts)},
+            }
+            with open(path, "w") as file:
+                json.dump(report, file, indent=2)
+        else:
+            raise ValueError(f"unsupported profile format: {path}")
+        
+    def draw(self, screen):
+        if self.text_cache is None:
+            self.text_cache = TextCache(pygame.font.SysFont(None, 20))
+        if self.frames % PROFILE_REFRESH == 0 or not self.panel_lines:
+            self.panel_lines = self.build_panel()
+        panel = self.panel_rect
+        screen.fill((20, 20, 40), panel)
+        
+        # One row per section: a bar to p50 and a tick at p99, on a scale
+        # set by the slowest section's p99
+        left = panel.x + 10
+        y = panel.y + 8
+        scale = max([p99 for _, _, p99 in self.panel_lines[2:]] + [0.001])
+        for slot, text, p99 in self.panel_lines:
+            screen.blit(self.text_cache.render(slot, text), (left, y))
+            if slot in PROFILE_SECTIONS:
+                stats = self.panel_stats[slot]
+                bar_left = left + 170
+                pygame.draw.rect(screen, GREEN, (bar_left, y + 3, int(80 * stats["p50"] / scale), 8))
+                pygame.draw.line(screen, RED, (bar_left + int(80 * p99 / scale), y + 1),
+                                 (bar_left + int(80 * p99 / scale), y + 12))
+            y += 16
+            
+        # Frame-time histogram with the 60 FPS budget marked
+        bins = [0] * PROFILE_HISTOGRAM_MS
+        for frame_ms in self.samples["frame"]:
+            bins[min(int(frame_ms), PROFILE_HISTOGRAM_MS - 1)] += 1
+        tallest = max(bins) or 1
+        base = panel.bottom - 8
+        for index, count in enumerate(bins):
+            height = int(50 * count / tallest)
+            pygame.draw.rect(screen, YELLOW, (left + index * 7, base - height, 6, height))
+        budget_x = left + int(7 * 1000 / FPS)
+        pygame.draw.line(screen, RED, (budget_x, base - 54), (budget_x, base))
+        
+    def build_panel(self):
+        # (text cache slot, text, p99) rows for the overlay
+        self.panel_stats = {name: timing_stats(values) for name, values in self.samples.items()}
+        frame = self.panel_stats["frame"]
+        platforms, powerups, hazards = self.counts
+        lines = [("frame", f"frame  p50 {frame['p50']:.2f}  p99 {frame['p99']:.2f} ms", frame["p99"]),
+                 ("entities", f"platforms {platforms}  powerups {powerups}  hazards {hazards}", 0)]
+        for name in PROFILE_SECTIONS:
+            stats = self.panel_stats[name]
+            lines.append((name, f"{name:<10} {stats['p50']:.3f} / {stats['p99']:.3f}", stats["p99"]))
+        return lines
+
+def prepare_surface(surface):
+    # Convert to the display's pixel format, when there is a display, so
+    # blits are straight copies
+    if pygame.display.get_surface() is None:
+        return surface
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
+
+def render_wings_sprite(facing_right):
+    wings = pygame.Surface((11, 21), pygame.SRCALPHA)
+    if facing_right:
+        points = [(10, 0), (0, 10), (10, 20)]
+    else:
+        points = [(0, 0), (10, 10), (0, 20)]
+    pygame.draw.polygon(wings, (220, 220, 255), points)
+    return prepare_surface(wings)
+
+def render_clock_sprite():
+    clock = pygame.Surface((13, 13), pygame.SRCALPHA)
+    pygame.draw.circle(clock, YELLOW, (6, 6), 5)
+    pygame.draw.line(clock, BLACK, (6, 6), (6, 1), 2)
+    pygame.draw.line(clock, BLACK, (6, 6), (9, 8), 2)
+    return prepare_surface(clock)
+
+def render_magnet_sprite(player_width):
+    magnet_color = (200, 50, 50)
+    magnet = pygame.Surface((player_width - 10, 10), pygame.SRCALPHA)
+    pygame.draw.rect(magnet, magnet_color, (0, 5, player_width - 10, 5))
+    pygame.draw.rect(magnet, magnet_color, (player_width//2 - 7, 0, 4, 5))
+    return prepare_surface(magnet)
+
+def swept_landing(bottom, vel_y, vel_x, left, width, top, platform_left, platform_right, maximum=max):
+    # Swept landing test for a falling player, on numbers or, with
+    # maximum=np.maximum, on broadcast arrays of players and platforms. This
+    # step the feet fell from bottom - vel_y to bottom and the body slid
+    # vel_x sideways: true if the feet crossed the platform top and the body
+    # overlapped the platform at that moment, so no fall speed can carry the
+    # player through a platform.
+    crossed = (bottom >= top) & (bottom - vel_y <= top + 10)
+    # Where the feet crossed the top, crossed_at is at most 1 already
+    crossed_at = maximum((top - bottom + vel_y) / vel_y, 0.0)
+    swept_left = left - vel_x * (1 - crossed_at)
+    return crossed & (swept_left < platform_right) & (swept_left + width > platform_left)
+
 class Player:
     def __init__(self, x, y):
+        self.width = PLAYER_WIDTH
+        self.height = 50
+        self.rect = pygame.Rect(x, y, self.width, self.height)
+        
+        # Create simple character sprite frames
+        self.create_sprite_frames()
+        self.animation_speed = 5  # frames between animation updates
+        self.reset(x, y)
+        
+    def reset(self, x, y):
+        # Back to the starting state at (x, y), keeping rect and sprites
         self.x = x
         self.y = y
-        self.width = 30
-        self.height = 50
         self.vel_x = 0
         self.vel_y = 0
         self.is_jumping = False
         self.can_double_jump = False
         self.has_wings = False
-        self.wings_timer = 0
         self.slow_time = False
-        self.slow_time_timer = 0
         self.magnet = False
-        self.magnet_timer = 0
         self.score = 0
-        self.rect = pygame.Rect(x, y, self.width, self.height)
+        self.rect.topleft = (x, y)
         self.facing_right = True
-        
-        # Create simple character sprite frames
-        self.create_sprite_frames()
         self.current_frame = 0
         self.animation_timer = 0
-        self.animation_speed = 5  # frames between animation updates
         
     def create_sprite_frames(self):
-        # Create simple character sprite
-        self.frames_right = []
-        self.frames_left = []
+        # Frames are rendered once per process and shared by every Player
+        self.frames_right, self.frames_left = sprite_cache.get(
+            ("player", self.width, self.height), self.render_sprite_frames)
         
+    def render_sprite_frames(self, width, height):
+        # Create simple character sprite
         # Standing frame
-        standing_right = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+        standing_right = pygame.Surface((width, height), pygame.SRCALPHA)
         # Body
         pygame.draw.rect(standing_right, BLUE, (5, 10, 20, 30))
         # Head
@@ -138,7 +400,7 @@ class Player:
         pygame.draw.rect(standing_right, (50, 50, 180), (16, 40, 6, 10))
         
         # Walking frame 1
-        walking1_right = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+        walking1_right = pygame.Surface((width, height), pygame.SRCALPHA)
         # Body
         pygame.draw.rect(walking1_right, BLUE, (5, 10, 20, 30))
         # Head
@@ -148,7 +410,7 @@ class Player:
         pygame.draw.rect(walking1_right, (50, 50, 180), (18, 38, 6, 12))
         
         # Walking frame 2
-        walking2_right = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+        walking2_right = pygame.Surface((width, height), pygame.SRCALPHA)
         # Body
         pygame.draw.rect(walking2_right, BLUE, (5, 10, 20, 30))
         # Head
@@ -158,7 +420,7 @@ class Player:
         pygame.draw.rect(walking2_right, (50, 50, 180), (16, 40, 6, 10))
         
         # Jumping frame
-        jumping_right = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+        jumping_right = pygame.Surface((width, height), pygame.SRCALPHA)
         # Body
         pygame.draw.rect(jumping_right, BLUE, (5, 10, 20, 30))
         # Head
@@ -168,13 +430,20 @@ class Player:
         pygame.draw.rect(jumping_right, (50, 50, 180), (15, 40, 5, 8))
         
         # Add frames to right-facing list
-        self.frames_right = [standing_right, walking1_right, walking2_right, jumping_right]
+        frames_right = [standing_right, walking1_right, walking2_right, jumping_right]
         
         # Create left-facing frames by flipping the right-facing ones
-        for frame in self.frames_right:
-            self.frames_left.append(pygame.transform.flip(frame, True, False))
+        frames_left = [pygame.transform.flip(frame, True, False) for frame in frames_right]
+        return ([prepare_surface(frame) for frame in frames_right],
+                [prepare_surface(frame) for frame in frames_left])
         
     def update(self, platforms, wind_force=0, time_factor=1.0):
+        self.move(wind_force, time_factor)
+        
+        # Check for platform collisions
+        self.check_platform_collisions(platforms)
+    
+    def move(self, wind_force=0, time_factor=1.0):
         # Apply gravity
         self.vel_y += GRAVITY * time_factor
         
@@ -218,47 +487,47 @@ class Player:
         # Update rectangle for collision detection
         self.rect.x = int(self.x)
         self.rect.y = int(self.y)
-        
-        # Check for platform collisions
-        self.check_platform_collisions(platforms)
-        
-        # Update powerup timers
-        if self.has_wings:
-            self.wings_timer -= time_factor
-            if self.wings_timer <= 0:
-                self.has_wings = False
-                
-        if self.slow_time:
-            self.slow_time_timer -= time_factor
-            if self.slow_time_timer <= 0:
-                self.slow_time = False
-                
-        if self.magnet:
-            self.magnet_timer -= time_factor
-            if self.magnet_timer <= 0:
-                self.magnet = False
     
     def check_platform_collisions(self, platforms):
-        if self.vel_y > 0:  # Only check when falling
-            for platform in platforms:
-                if (self.rect.bottom >= platform.rect.top and
-                    self.rect.bottom <= platform.rect.top + self.vel_y + 10 and
-                    self.rect.right > platform.rect.left and
-                    self.rect.left < platform.rect.right):
-                    
-                    # Land on platform
-                    self.rect.bottom = platform.rect.top
-                    self.y = self.rect.y
-                    self.vel_y = 0
-                    self.is_jumping = False
-                    self.can_double_jump = True
-                    
-                    # Handle platform types
-                    if platform.platform_type == PlatformType.BREAKING:
-                        platform.breaking = True
-                    elif platform.platform_type == PlatformType.BOUNCE:
-                        self.vel_y = JUMP_FORCE * 1.5
-                        self.is_jumping = True
+        landing = self.landing_on(platforms)
+        if landing is not None:
+            self.land(landing)
+            
+    def landing_on(self, platforms):
+        # The platform this step's fall lands on, or None
+        if self.vel_y <= 0:  # Only check when falling
+            return None
+        # Indexed platform sets narrow the scan down to likely landings
+        landing_candidates = getattr(platforms, "landing_candidates", None)
+        if landing_candidates is not None:
+            platforms = landing_candidates(self.rect, self.vel_y, self.vel_x)
+            
+        # Land on the first platform top crossed
+        rect = self.rect
+        landing = None
+        for platform in platforms:
+            target = platform.rect
+            if landing is not None and target.top >= landing.rect.top:
+                continue
+            if swept_landing(rect.bottom, self.vel_y, self.vel_x, rect.left, self.width,
+                             target.top, target.left, target.right):
+                landing = platform
+        return landing
+    
+    def land(self, platform):
+        # Land on platform
+        self.rect.bottom = platform.rect.top
+        self.y = self.rect.y
+        self.vel_y = 0
+        self.is_jumping = False
+        self.can_double_jump = True
+        
+        # Handle platform types
+        if platform.platform_type == PlatformType.BREAKING:
+            platform.breaking = True
+        elif platform.platform_type == PlatformType.BOUNCE:
+            self.vel_y = JUMP_FORCE * 1.5
+            self.is_jumping = True
     
     def jump(self):
         if not self.is_jumping:
@@ -276,42 +545,59 @@ class Player:
         # Draw powerup indicators
         if self.has_wings:
             # Draw wing indicators
-            wing_color = (220, 220, 255)
-            wing_x = self.x - 8 if self.facing_right else self.x + self.width - 2
-            pygame.draw.polygon(screen, wing_color, [
-                (wing_x, self.y - camera_y + 15),
-                (wing_x - 10 if self.facing_right else wing_x + 10, self.y - camera_y + 25),
-                (wing_x, self.y - camera_y + 35)
-            ])
+            wings = sprite_cache.get(("wings", self.facing_right), render_wings_sprite)
+            wing_x = self.x - 18 if self.facing_right else self.x + self.width - 2
+            screen.blit(wings, (wing_x, self.y - camera_y + 15))
         
         if self.slow_time:
             # Draw clock indicator above head
-            pygame.draw.circle(screen, YELLOW, (int(self.x + self.width/2), int(self.y - camera_y - 10)), 5)
-            pygame.draw.line(screen, BLACK, 
-                            (int(self.x + self.width/2), int(self.y - camera_y - 10)),
-                            (int(self.x + self.width/2), int(self.y - camera_y - 15)), 2)
-            pygame.draw.line(screen, BLACK, 
-                            (int(self.x + self.width/2), int(self.y - camera_y - 10)),
-                            (int(self.x + self.width/2 + 3), int(self.y - camera_y - 8)), 2)
+            clock = sprite_cache.get(("slow_time",), render_clock_sprite)
+            screen.blit(clock, (int(self.x + self.width/2) - 6, int(self.y - camera_y - 10) - 6))
             
         if self.magnet:
             # Draw magnet indicator
-            magnet_color = (200, 50, 50)
-            pygame.draw.rect(screen, magnet_color, (self.x + 5, self.y - camera_y - 5, self.width - 10, 5))
-            pygame.draw.rect(screen, magnet_color, (self.x + self.width//2 - 2, self.y - camera_y - 10, 4, 5))
+            magnet = sprite_cache.get(("magnet", self.width), render_magnet_sprite)
+            screen.blit(magnet, (self.x + 5, self.y - camera_y - 10))
+
+class EntityPool:
+    # Free list of culled entities of one class. acquire() re-initializes a
+    # released entity in place, rect included, before allocating a new one.
+    def __init__(self, entity_class):
+        self.entity_class = entity_class
+        self.free = []
+        
+    def acquire(self, *args):
+        if self.free:
+            entity = self.free.pop()
+            entity.reset(*args)
+            return entity
+        return self.entity_class(*args)
+        
+    def release(self, entity):
+        self.free.append(entity)
+        
+    def release_all(self, entities):
+        self.free.extend(entities)
 
 class Platform:
+    __slots__ = ("x", "y", "width", "height", "platform_type", "rect", "breaking", "break_timer",
+                 "direction", "move_distance", "original_x")
+    
     def __init__(self, x, y, width, platform_type=PlatformType.STATIC):
+        self.rect = pygame.Rect(x, y, width, 15)
+        self.reset(x, y, width, platform_type)
+        
+    def reset(self, x, y, width, platform_type=PlatformType.STATIC):
         self.x = x
         self.y = y
         self.width = width
         self.height = 15
         self.platform_type = platform_type
-        self.rect = pygame.Rect(x, y, width, self.height)
+        self.rect.update(x, y, width, self.height)
         self.breaking = False
         self.break_timer = 30  # frames before disappearing
         self.direction = 1  # For moving platforms
-        self.move_distance = 100  # For moving platforms
+        self.move_distance = MOVE_DISTANCE  # For moving platforms
         self.original_x = x  # For moving platforms
         
     def update(self):
@@ -345,16 +631,71 @@ class Platform:
         elif self.platform_type == PlatformType.BOUNCE:
             color = BOUNCE_PLATFORM_COLOR
             
-        pygame.draw.rect(screen, color, (self.x, self.y - camera_y, self.width, self.height))
+        sprite = sprite_cache.solid("platform", self.width, self.height, color)
+        screen.blit(sprite, (self.x, self.y - camera_y))
+
+class EntityIndex:
+    # Entities bucketed by their top edge so that queries only touch the
+    # requested vertical band. Only entities that never move vertically
+    # (platforms, powerups) are indexed, so an entity stays in its bucket
+    # until it is removed.
+    def __init__(self, bucket_height=INDEX_BUCKET_HEIGHT):
+        self.bucket_height = bucket_height
+        self.buckets = {}
+        self.count = 0
+        
+    def __len__(self):
+        return self.count
+        
+    def add(self, entity):
+        key = entity.rect.top // self.bucket_height
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self.buckets[key] = [entity]
+        else:
+            bucket.append(entity)
+        self.count += 1
+        
+    def remove(self, entity):
+        key = entity.rect.top // self.bucket_height
+        bucket = self.buckets[key]
+        bucket.remove(entity)
+        if not bucket:
+            del self.buckets[key]
+        self.count -= 1
+        
+    def clear(self):
+        self.buckets.clear()
+        self.count = 0
+        
+    def landing_candidates(self, rect, vel_y, vel_x=0):
+        # Platforms whose top lies inside the player's landing window
+        return self.query(math.floor(rect.bottom - vel_y - 10), rect.bottom)
+        
+    def query(self, top, bottom):
+        # Entities with top <= entity.rect.top <= bottom
+        for key in range(top // self.bucket_height, bottom // self.bucket_height + 1):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                continue
+            for entity in bucket:
+                if top <= entity.rect.top <= bottom:
+                    yield entity
 
 class Powerup:
+    __slots__ = ("x", "y", "width", "height", "powerup_type", "rect", "collected")
+    
     def __init__(self, x, y, powerup_type):
+        self.rect = pygame.Rect(x, y, 20, 20)
+        self.reset(x, y, powerup_type)
+        
+    def reset(self, x, y, powerup_type):
         self.x = x
         self.y = y
         self.width = 20
         self.height = 20
         self.powerup_type = powerup_type
-        self.rect = pygame.Rect(x, y, self.width, self.height)
+        self.rect.update(x, y, self.width, self.height)
         self.collected = False
         
     def draw(self, screen, camera_y):
@@ -371,17 +712,24 @@ class Powerup:
         elif self.powerup_type == PowerupType.SLOW_TIME:
             color = YELLOW
             
-        pygame.draw.rect(screen, color, (self.x, self.y - camera_y, self.width, self.height))
+        sprite = sprite_cache.solid("powerup", self.width, self.height, color)
+        screen.blit(sprite, (self.x, self.y - camera_y))
 
 class Hazard:
+    __slots__ = ("x", "y", "width", "height", "hazard_type", "speed", "rect")
+    
     def __init__(self, x, y, hazard_type, speed=2):
+        self.rect = pygame.Rect(x, y, 30, 30)
+        self.reset(x, y, hazard_type, speed)
+        
+    def reset(self, x, y, hazard_type, speed=2):
         self.x = x
         self.y = y
         self.width = 30
         self.height = 30
         self.hazard_type = hazard_type  # "spike", "bird", "rock"
         self.speed = speed
-        self.rect = pygame.Rect(x, y, self.width, self.height)
+        self.rect.update(x, y, self.width, self.height)
         
     def update(self, time_factor=1.0):
         if self.hazard_type == "bird":
@@ -395,148 +743,768 @@ class Hazard:
         self.rect.y = int(self.y)
         
     def draw(self, screen, camera_y):
-        pygame.draw.rect(screen, RED, (self.x, self.y - camera_y, self.width, self.height))
+        sprite = sprite_cache.solid("hazard", self.width, self.height, RED)
+        screen.blit(sprite, (self.x, self.y - camera_y))
 
-class Game:
+# Entities culled from any Game are recycled by all of them, like sprites
+platform_pool = EntityPool(Platform)
+powerup_pool = EntityPool(Powerup)
+hazard_pool = EntityPool(Hazard)
+
+HAZARD_KINDS = ("spike", "bird", "rock")
+
+def array_field(name, cast=float):
+    # Property reading and writing one row of a struct-of-arrays column
+    def get(self):
+        return cast(getattr(self.arrays, name)[self.index])
+    
+    def set(self, value):
+        getattr(self.arrays, name)[self.index] = value
+    
+    return property(get, set)
+
+def rects_overlap(rect, left, top, width, height):
+    # Batched pygame.Rect.colliderect of one rect against columns of rects
+    return (left < rect.right) & (rect.left < left + width) & (top < rect.bottom) & (rect.top < top + height)
+
+class EntityView:
+    # Object API onto row `index` of an EntityArrays store
+    __slots__ = ("arrays", "index")
+    
+    def __init__(self, arrays, index):
+        self.arrays = arrays
+        self.index = index
+        
+    @property
+    def rect(self):
+        return pygame.Rect(int(self.x), int(self.y), self.width, self.height)
+
+class PlatformView(EntityView):
+    __slots__ = ()
+    height = 15
+    move_distance = MOVE_DISTANCE
+    x = array_field("x")
+    y = array_field("y")
+    width = array_field("width", int)
+    direction = array_field("direction", int)
+    original_x = array_field("original_x")
+    breaking = array_field("breaking", bool)
+    break_timer = array_field("break_timer", int)
+    
+    @property
+    def platform_type(self):
+        return PlatformType(int(self.arrays.kind[self.index]))
+    
+    draw = Platform.draw
+
+class PowerupView(EntityView):
+    __slots__ = ()
+    width = 20
+    height = 20
+    x = array_field("x")
+    y = array_field("y")
+    collected = array_field("collected", bool)
+    
+    @property
+    def powerup_type(self):
+        return PowerupType(int(self.arrays.kind[self.index]))
+    
+    draw = Powerup.draw
+
+class HazardView(EntityView):
+    __slots__ = ()
+    width = 30
+    height = 30
+    x = array_field("x")
+    y = array_field("y")
+    speed = array_field("speed")
+    
+    @property
+    def hazard_type(self):
+        return HAZARD_KINDS[self.arrays.kind[self.index]]
+    
+    draw = Hazard.draw
+
+class EntityArrays:
+    # Struct-of-arrays storage for one kind of entity. Rows [0, count) are
+    # live and views[i] is the object-API view of row i.
+    columns = ()
+    view_class = EntityView
+    
+    def __init__(self, capacity=256):
+        self.count = 0
+        self.views = []
+        for name, dtype in self.columns:
+            setattr(self, name, np.zeros(capacity, dtype))
+            
+    def __len__(self):
+        return self.count
+        
+    def column(self, name):
+        return getattr(self, name)[:self.count]
+        
+    def append(self, **values):
+        if self.count == len(getattr(self, self.columns[0][0])):
+            self.grow()
+        index = self.count
+        for name, value in values.items():
+            getattr(self, name)[index] = value
+        self.count += 1
+        view = self.view_class(self, index)
+        self.views.append(view)
+        return view
+        
+    def grow(self):
+        for name, dtype in self.columns:
+            old = getattr(self, name)
+            new = np.zeros(len(old) * 2, dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+            
+    def in_band(self, top, bottom):
+        # Views of the rows with top <= y <= bottom
+        y = self.column("y")
+        return [self.views[index] for index in np.flatnonzero((y >= top) & (y <= bottom))]
+        
+    def compact(self, keep):
+        # Drop the rows where keep is False, preserving order
+        if keep.all():
+            return
+        kept = np.flatnonzero(keep)
+        count = len(kept)
+        for name, _ in self.columns:
+            array = getattr(self, name)
+            array[:count] = array[kept]
+        views = self.views
+        views[:] = [views[index] for index in kept]
+        for index, view in enumerate(views):
+            view.index = index
+        self.count = count
+        
+    def clear(self):
+        self.count = 0
+        self.views.clear()
+        
+    def capture(self, spec):
+        # Pack the live rows into array.array columns (spec: name, typecode)
+        return {name: array(typecode, self.column(name).astype(typecode).tobytes())
+                for name, typecode in spec}
+        
+    def restore(self, columns):
+        # Load snapshot columns (NumPy arrays or array.array) as the live rows
+        count = len(columns["x"])
+        while len(self.x) < count:
+            self.grow()
+        for name, dtype in self.columns:
+            getattr(self, name)[:count] = np.asarray(columns[name], dtype=dtype)
+        self.views[:] = [self.view_class(self, index) for index in range(count)]
+        self.count = count
+
+class PlatformArrays(EntityArrays):
+    columns = (("x", np.float64), ("y", np.float64), ("width", np.int32), ("kind", np.int8),
+               ("direction", np.int8), ("original_x", np.float64), ("breaking", np.bool_),
+               ("break_timer", np.int32)) if np is not None else ()
+    view_class = PlatformView
+    
+    def add(self, platform):
+        return self.append(x=platform.x, y=platform.y, width=platform.width,
+                           kind=platform.platform_type.value, direction=platform.direction,
+                           original_x=platform.original_x, breaking=platform.breaking,
+                           break_timer=platform.break_timer)
+        
+    def update(self):
+        # Batched Platform.update
+        x = self.column("x")
+        direction = self.column("direction")
+        moving = self.column("kind") == PlatformType.MOVING.value
+        x[moving] += PLATFORM_SPEED * direction[moving]
+        original_x = self.column("original_x")
+        direction[moving & (x > original_x + PlatformView.move_distance)] = -1
+        direction[moving & (x < original_x - PlatformView.move_distance)] = 1
+        self.column("break_timer")[self.column("breaking")] -= 1
+        
+    def shift(self, offsets):
+        # Quake: move every platform sideways, clamped to the screen
+        x = self.column("x")
+        x += offsets
+        np.clip(x, 0, SCREEN_WIDTH - self.column("width"), out=x)
+        moving = self.column("kind") == PlatformType.MOVING.value
+        self.column("original_x")[moving] = x[moving]
+        
+    def landing_candidates(self, rect, vel_y, vel_x=0):
+        # Batched broad phase of Player.check_platform_collisions: landing
+        # window, and overlap with the horizontal span swept this step
+        top = self.column("y").astype(np.int64)
+        left = self.column("x").astype(np.int64)
+        right = left + self.column("width")
+        swept_left = min(rect.left, rect.left - vel_x)
+        swept_right = max(rect.right, rect.right - vel_x)
+        hits = np.flatnonzero((rect.bottom >= top) & (rect.bottom <= top + vel_y + 10) &
+                              (swept_right > left) & (swept_left < right))
+        return [self.views[index] for index in hits]
+        
+    def cull(self, cull_y):
+        broken = self.column("breaking") & (self.column("break_timer") <= 0)
+        self.compact(~(broken | (self.column("y") > cull_y)))
+
+class PowerupArrays(EntityArrays):
+    columns = (("x", np.float64), ("y", np.float64), ("kind", np.int8),
+               ("collected", np.bool_)) if np is not None else ()
+    view_class = PowerupView
+    
+    def add(self, powerup):
+        return self.append(x=powerup.x, y=powerup.y, kind=powerup.powerup_type.value,
+                           collected=powerup.collected)
+        
+    def touching(self, rect, cull_y):
+        # Uncollected, on-screen powerups overlapping rect
+        x = self.column("x").astype(np.int64)
+        y = self.column("y").astype(np.int64)
+        hits = (~self.column("collected") & (self.column("y") <= cull_y) &
+                rects_overlap(rect, x, y, PowerupView.width, PowerupView.height))
+        return [self.views[index] for index in np.flatnonzero(hits)]
+        
+    def cull(self, cull_y):
+        self.compact(~(self.column("collected") | (self.column("y") > cull_y)))
+
+class HazardArrays(EntityArrays):
+    columns = (("x", np.float64), ("y", np.float64), ("speed", np.float64),
+               ("kind", np.int8)) if np is not None else ()
+    view_class = HazardView
+    
+    def add(self, hazard):
+        return self.append(x=hazard.x, y=hazard.y, speed=hazard.speed,
+                           kind=HAZARD_KINDS.index(hazard.hazard_type))
+        
+    def update(self, time_factor=1.0):
+        # Batched Hazard.update
+        x = self.column("x")
+        y = self.column("y")
+        kind = self.column("kind")
+        speed = self.column("speed")
+        birds = kind == HAZARD_KINDS.index("bird")
+        x[birds] += speed[birds] * time_factor
+        x[birds & (x > SCREEN_WIDTH)] = -HazardView.width
+        rocks = kind == HAZARD_KINDS.index("rock")
+        y[rocks] += speed[rocks] * time_factor
+        
+    def touching(self, rect):
+        # Last hazard overlapping rect, or None
+        x = self.column("x").astype(np.int64)
+        y = self.column("y").astype(np.int64)
+        hits = np.flatnonzero(rects_overlap(rect, x, y, HazardView.width, HazardView.height))
+        return self.views[hits[-1]] if len(hits) else None
+        
+    def cull(self, cull_y):
+        self.compact(self.column("y") <= cull_y)
+
+class VectorWorld:
+    # Struct-of-arrays backend: platforms, powerups and hazards live in NumPy
+    # columns and are updated and collision-tested in batches
+    def __init__(self):
+        if np is None:
+            raise RuntimeError("The vectorized world backend requires NumPy")
+        self.platforms = PlatformArrays()
+        self.powerups = PowerupArrays()
+        self.hazards = HazardArrays()
+        
+    def clear(self):
+        self.platforms.clear()
+        self.powerups.clear()
+        self.hazards.clear()
+
+def descent_steps(jumps):
+    # Steps Player.move's vertical physics from a standing takeoff. jumps maps
+    # step -> jump velocity (step 0 is the takeoff). Returns steps[rise]: the
+    # last step at which the falling feet cross `rise` px above the takeoff,
+    # or 0 where the jump never gets that high.
+    heights = [0.0]
+    vel_y = 0.0
+    step = 0
+    while heights[-1] >= 0 or vel_y < 0:
+        if step in jumps:
+            vel_y = jumps[step]
+        step += 1
+        vel_y += GRAVITY
+        heights.append(heights[-1] - vel_y)
+    steps = [0] * (int(max(heights)) + 1)
+    for step in range(1, len(heights)):
+        low, high = heights[step], heights[step - 1]
+        if low < high:
+            for rise in range(max(0, math.ceil(low)), int(high) + 1):
+                steps[rise] = step
+    return steps
+
+class JumpEnvelope:
+    # The player's reachable region, derived once from the Player.move
+    # physics: for every whole-pixel rise, how far sideways a jump can carry
+    # the player before falling back through that height. Lookups are O(1).
+    modes = {"jump": (JUMP_FORCE, None), "double": (JUMP_FORCE, JUMP_FORCE),
+             "bounce": (JUMP_FORCE * 1.5, JUMP_FORCE)}  # launch, second jump
+    winds = {"calm": 0, "tailwind": WIND_FORCE, "headwind": -WIND_FORCE}
+    
+    def __init__(self):
+        self.steps = {}  # mode -> steps in the air, by rise
+        self.apex = {}  # mode -> highest rise reached
+        for mode, (launch, second) in self.modes.items():
+            steps = descent_steps({0: launch})
+            if second is not None:
+                # Fire the second jump at whichever step carries furthest
+                for delay in range(1, max(steps) + 1):
+                    delayed = descent_steps({0: launch, delay: second})
+                    steps.extend([0] * (len(delayed) - len(steps)))
+                    for rise, step in enumerate(delayed):
+                        if step > steps[rise]:
+                            steps[rise] = step
+            self.steps[mode] = steps
+            self.apex[mode] = len(steps) - 1
+        # Holding a direction, apply_input sets vel_x to PLAYER_SPEED each
+        # step and move() adds wind before friction
+        self.reach_tables = {(mode, wind): [step * (PLAYER_SPEED + force) * 0.9 if step else -1
+                                            for step in steps]
+                             for mode, steps in self.steps.items()
+                             for wind, force in self.winds.items()}
+        
+    def reach(self, mode, rise, wind="calm"):
+        # Horizontal reach in px for a target `rise` px up, or -1 out of range
+        table = self.reach_tables[mode, wind]
+        rise = int(rise)
+        return table[rise] if 0 <= rise < len(table) else -1
+        
+    def source_mode(self, platform_type):
+        # Landing on a bounce platform always launches the player; from any
+        # other platform the double jump is available
+        return "bounce" if platform_type == PlatformType.BOUNCE else "double"
+
+def standing_span(x, width, platform_type):
+    # Range of player left edges that overlap a platform, widened by the full
+    # travel of a moving platform
+    travel = MOVE_DISTANCE if platform_type == PlatformType.MOVING else 0
+    return x - travel - PLAYER_WIDTH + 1, x + width + travel - 1
+
+jump_envelope = JumpEnvelope()
+
+class TowerChunk:
+    def __init__(self, index, top):
+        self.index = index
+        self.top = top  # y of the chunk's top edge; its last platform sits on it
+        self.platforms = []
+        self.powerups = []
+        self.hazards = []
+
+class TowerGenerator:
+    # Builds the tower in CHUNK_HEIGHT slices. Each chunk is a pure function
+    # of (seed, chunk index), so any chunk can be rebuilt on demand and
+    # building chunks ahead of time never changes the tower.
+    def __init__(self, seed):
+        self.seed = seed
+        self.ready = {}  # chunk index -> chunk built ahead of time
+        
+    def build(self, index):
+        rng = random.Random(f"{self.seed}:{index}")
+        bottom = TOWER_BASE_Y - index * CHUNK_HEIGHT
+        chunk = TowerChunk(index, bottom - CHUNK_HEIGHT)
+        
+        # Every platform is kept reachable from the one below it. The chunk's
+        # edges are drawn from their own streams, so the platform a chunk
+        # climbs from is known without building the chunk below.
+        previous = self.edge(index - 1)
+        edge = self.edge(index)
+        
+        # Gaps are drawn so the last platform lands exactly on the top edge,
+        # which keeps the gap into the next chunk in range too
+        y = bottom
+        while y > chunk.top:
+            remaining = y - chunk.top
+            if remaining > PLATFORM_GAP_MAX:
+                y -= rng.randint(PLATFORM_GAP_MIN, min(PLATFORM_GAP_MAX, remaining - PLATFORM_GAP_MIN))
+                platform_x, platform_width, platform_type = self.draw_platform(rng, y)
+                # The row below the edge must also reach the edge
+                below_edge = y - chunk.top <= PLATFORM_GAP_MAX
+                platform_x = self.place(platform_x, y, platform_width, platform_type,
+                                        previous, edge if below_edge else None)
+                previous = (platform_x, y, platform_width, platform_type)
+            else:
+                y = chunk.top
+                previous = edge
+            self.build_row(rng, chunk, *previous)
+        return chunk
+        
+    def edge(self, index):
+        # The platform on top of chunk `index`; the start platform for -1
+        if index < 0:
+            return START_PLATFORM + (PlatformType.STATIC,)
+        y = TOWER_BASE_Y - (index + 1) * CHUNK_HEIGHT
+        platform_x, platform_width, platform_type = self.draw_platform(
+            random.Random(f"{self.seed}:{index}:edge"), y)
+        return platform_x, y, platform_width, platform_type
+        
+    def draw_platform(self, rng, y):
+        platform_width = rng.randint(60, 150)
+        platform_x = rng.randint(0, SCREEN_WIDTH - platform_width)
+        
+        # Determine platform type - higher up means more difficult platforms
+        platform_type = PlatformType.STATIC
+        platform_chance = rng.random()
+        height_factor = min(0.7, abs(y) / 10000)  # Increases with height
+        
+        if platform_chance < 0.1 + height_factor * 0.1:
+            platform_type = PlatformType.BOUNCE
+        elif platform_chance < 0.3 + height_factor * 0.2:
+            platform_type = PlatformType.MOVING
+        elif platform_chance < 0.4 + height_factor * 0.3:
+            platform_type = PlatformType.BREAKING
+        return platform_x, platform_width, platform_type
+        
+    def place(self, x, y, width, platform_type, previous, edge=None):
+        # Shift x by as little as possible so the platform is in jump reach
+        # of `previous` and, if given, `edge` is in reach of it. Each bound
+        # is one envelope lookup, so repairing a placement is O(1).
+        low, high = self.reach_range(previous, jump_envelope.source_mode(previous[3]),
+                                     y, width, platform_type)
+        if edge is not None:
+            edge_low, edge_high = self.reach_range(edge, jump_envelope.source_mode(platform_type),
+                                                   y, width, platform_type)
+            low, high = max(low, edge_low), min(high, edge_high)
+        # Gaps are capped at PLATFORM_GAP_MAX, where a double jump still
+        # carries far enough sideways that some x reaches both neighbours
+        assert low <= high, f"no reachable x for a platform at y={y} (seed {self.seed})"
+        return min(max(x, low), high)
+        
+    def reach_range(self, other, mode, y, width, platform_type):
+        # On-screen x range of a platform at y whose standing span is within
+        # `mode` jump reach of platform `other` (either one can be the
+        # higher); the spans are in reach when neither is further than
+        # reach past the other's far end
+        other_x, other_y, other_width, other_type = other
+        other_left, other_right = standing_span(other_x, other_width, other_type)
+        left, right = standing_span(0, width, platform_type)
+        reach = jump_envelope.reach(mode, abs(other_y - y))
+        return (max(0, math.ceil(other_left - reach - right)),
+                min(SCREEN_WIDTH - width, int(other_right + reach - left)))
+        
+    def build_row(self, rng, chunk, platform_x, y, platform_width, platform_type):
+        chunk.platforms.append(platform_pool.acquire(platform_x, y, platform_width, platform_type))
+        height_factor = min(0.7, abs(y) / 10000)
+        
+        # Chance to add powerup above platform
+        if rng.random() < 0.1:
+            powerup_type = rng.choice(list(PowerupType))
+            chunk.powerups.append(powerup_pool.acquire(platform_x + platform_width//2 - 10, y - 30, powerup_type))
+            
+        # Chance to add hazard
+        if rng.random() < 0.05 + height_factor * 0.1 and y < SCREEN_HEIGHT - 300:  # No hazards near start
+            hazard_chance = rng.random()
+            if hazard_chance < 0.4:
+                # Spike on platform
+                chunk.hazards.append(hazard_pool.acquire(platform_x + rng.randint(10, platform_width-40), y - 15, "spike"))
+            elif hazard_chance < 0.8:
+                # Flying bird
+                bird_y = y - rng.randint(50, 100)
+                bird_speed = rng.choice([-3, 3])
+                bird_x = 0 if bird_speed > 0 else SCREEN_WIDTH
+                chunk.hazards.append(hazard_pool.acquire(bird_x, bird_y, "bird", bird_speed))
+            else:
+                # Falling rock
+                rock_x = rng.randint(0, SCREEN_WIDTH - 30)
+                rock_y = y - rng.randint(100, 200)
+                chunk.hazards.append(hazard_pool.acquire(rock_x, rock_y, "rock", 3))
+                
+    def take(self, index):
+        # The chunk's entities are handed over to the world, so a prefetched
+        # chunk is used once and rebuilt if it is ever needed again
+        chunk = self.ready.pop(index, None)
+        return chunk if chunk is not None else self.build(index)
+        
+    def prefetch(self, next_index):
+        # Build at most one missing look-ahead chunk, so the work is spread
+        # over frames instead of landing in the step that needs the chunk
+        for index in range(next_index, next_index + CHUNK_PREFETCH):
+            if index not in self.ready:
+                self.ready[index] = self.build(index)
+                return
+        
+class EventScheduler:
+    # Timed events on the simulation clock, kept in a heap of
+    # (due, priority, sequence, name). A step costs one comparison unless an
+    # event has fallen due; events due together fire lowest priority first,
+    # then in scheduling order.
     def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Tower Jumper")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont(None, 36)
+        self.queue = []
+        self.clear()
+        
+    def clear(self):
+        self.now = 0.0
+        self.queue.clear()
+        self.sequence = 0
+        
+    def schedule(self, delay, name, priority=0):
+        heapq.heappush(self.queue, (self.now + delay, priority, self.sequence, name))
+        self.sequence += 1
+        
+    def cancel(self, name):
+        # The heap is filtered in place, so an advance() in progress keeps
+        # popping from the live queue if a handler cancels an event
+        self.queue[:] = [event for event in self.queue if event[3] != name]
+        heapq.heapify(self.queue)
+        
+    def advance(self, elapsed):
+        # Move the clock on and yield the names of the events now due
+        self.now += elapsed
+        queue = self.queue
+        while queue and queue[0][0] <= self.now:
+            yield heapq.heappop(queue)[3]
+            
+    def state(self):
+        return [self.now, self.sequence, [list(event) for event in self.queue]]
+        
+    def load_state(self, state):
+        self.now, self.sequence, queue = state
+        self.queue[:] = [tuple(event) for event in queue]
+        heapq.heapify(self.queue)
+
+# Snapshot layout: Game and Player attributes are stored by name; entities
+# are stored as one packed column per attribute (array typecode per column)
+SNAPSHOT_GAME_FIELDS = ("seed", "next_chunk", "highest_y", "camera_y", "top_y", "score", "high_score", "game_over", "death_cause",
+                        "pending_jump", "quake_active", "quake_intensity", "rotation_angle",
+                        "wind_active", "wind_force")
+SNAPSHOT_PLAYER_FIELDS = ("x", "y", "vel_x", "vel_y", "is_jumping", "can_double_jump",
+                          "has_wings", "slow_time", "magnet", "facing_right", "current_frame",
+                          "animation_timer")
+SNAPSHOT_COLUMNS = {
+    "platforms": (("x", "d"), ("y", "d"), ("width", "i"), ("kind", "b"), ("direction", "b"),
+                  ("original_x", "d"), ("breaking", "b"), ("break_timer", "i")),
+    "powerups": (("x", "d"), ("y", "d"), ("kind", "b"), ("collected", "b")),
+    "hazards": (("x", "d"), ("y", "d"), ("speed", "d"), ("kind", "b")),
+}
+
+class GameSnapshot:
+    # Complete simulation state of a Game: cheap to take every frame, and
+    # serializable to a compact byte string for save-states or the network
+    MAGIC = b"TJS1"
+    
+    def __init__(self, game_state, player_state, rng_states, entities):
+        self.game_state = game_state
+        self.player_state = player_state
+        self.rng_states = rng_states
+        self.entities = entities  # kind -> {column name -> packed column}
+        
+    def to_bytes(self):
+        header = {
+            "game": self.game_state,
+            "player": self.player_state,
+            "rng": [[state[0], state[2]] for state in self.rng_states],
+            "counts": {kind: len(columns["x"]) for kind, columns in self.entities.items()},
+        }
+        header_bytes = json.dumps(header).encode()
+        chunks = [self.MAGIC, struct.pack("<I", len(header_bytes)), header_bytes]
+        for state in self.rng_states:
+            chunks.append(array("I", state[1]).tobytes())
+        for kind, spec in SNAPSHOT_COLUMNS.items():
+            for name, _ in spec:
+                chunks.append(self.entities[kind][name].tobytes())
+        return b"".join(chunks)
+        
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != cls.MAGIC:
+            raise ValueError("not a Tower Jumper snapshot")
+        header_length, = struct.unpack_from("<I", data, 4)
+        offset = 8 + header_length
+        header = json.loads(data[8:offset])
+        rng_states = []
+        for version, gauss_next in header["rng"]:
+            internal = array("I")
+            internal.frombytes(data[offset:offset + 625 * internal.itemsize])
+            offset += 625 * internal.itemsize
+            rng_states.append((version, tuple(internal), gauss_next))
+        entities = {}
+        for kind, spec in SNAPSHOT_COLUMNS.items():
+            count = header["counts"][kind]
+            columns = entities[kind] = {}
+            for name, typecode in spec:
+                column = array(typecode)
+                size = count * column.itemsize
+                column.frombytes(data[offset:offset + size])
+                offset += size
+                columns[name] = column
+        return cls(header["game"], header["player"], rng_states, entities)
+
+class Game:
+    def __init__(self, headless=False, vectorized=False, seed=None, dirty_rects=False, profile=False,
+                 score_store=None, offscreen=False):
+        self.headless = headless
+        # Offscreen games draw into a Surface over a NumPy array instead of a
+        # window; frame() views the last drawn frame without copying
+        self.offscreen = offscreen and not headless
+        # Dirty-rect rendering: only regions that changed are redrawn and
+        # pushed to the display while the camera is still
+        self.dirty_rects = dirty_rects and not self.offscreen
+        self.last_frame_state = None
+        self.last_dynamic_rects = []
+        # All world generation and tower events draw from this RNG, so a
+        # seed reproduces a run independently of any other Game. Rendering
+        # has its own RNG so drawing frames never changes the simulation.
+        if seed is None:
+            seed = random.getrandbits(63)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.render_rng = random.Random(seed)
+        self.pending_jump = False
+        self.replay = None
+        self.record_dir = None
+        self.tower = TowerGenerator(seed)
+        self.next_chunk = 0
+        self.highest_y = TOWER_BASE_Y
+        self.world = VectorWorld() if vectorized else None
+        # Frame-section timings; headless runs keep every frame for export,
+        # windowed runs show the overlay (F3 toggles it)
+        self.profiler = FrameProfiler(keep_history=headless) if profile else None
+        self.show_profile = profile and not headless
+        if headless:
+            # Simulation only: no window, clock or fonts
+            self.screen = None
+            self.clock = None
+            self.font = None
+            self.text_cache = None
+            self.overlay = None
+        else:
+            if self.offscreen:
+                if np is None:
+                    raise RuntimeError("offscreen rendering requires NumPy")
+                self.frame_buffer = np.zeros((SCREEN_HEIGHT, SCREEN_WIDTH, 4), dtype=np.uint8)
+                self.screen = pygame.image.frombuffer(self.frame_buffer, (SCREEN_WIDTH, SCREEN_HEIGHT), "RGBX")
+                self.clock = None
+            else:
+                pygame.display.init()
+                self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+                pygame.display.set_caption("Tower Jumper")
+                self.clock = pygame.time.Clock()
+            self.font = pygame.font.SysFont(None, 36)
+            self.text_cache = TextCache(self.font)
+            # Game over dimming layer, built once and reused every frame
+            self.overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+            self.overlay.fill((0, 0, 0, 128))
+            self.overlay = prepare_surface(self.overlay)
         self.running = True
         self.game_over = False
+        self.death_cause = None
         self.score = 0
-        self.high_score = 0
+        # Finished runs are saved to score_store, when given, and the high
+        # score carries over between sessions through it
+        self.score_store = score_store
+        self.high_score = score_store.best() if score_store is not None else 0
         
         # Game objects
-        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100)
-        self.platforms = []
-        self.powerups = []
-        self.hazards = []
+        self.player = Player(*PLAYER_START)
+        self.top_y = self.player.y  # highest point the player has reached
+        self.clear_world()
         
         # Camera
         self.camera_y = 0
+        self.previous_view = None  # camera and player before the last step
         
-        # Tower effects
-        self.quake_timer = FPS * random.randint(QUAKE_INTERVAL_MIN, QUAKE_INTERVAL_MAX)
-        self.quake_active = False
-        self.quake_duration = 0
-        self.quake_intensity = 0
-        self.rotation_angle = 0
-        
-        # Wind effects
-        self.wind_timer = FPS * random.randint(WIND_INTERVAL_MIN, WIND_INTERVAL_MAX)
-        self.wind_active = False
-        self.wind_duration = 0
-        self.wind_force = 0
+        # Timed events (tower quakes and wind, powerup expiry) run on a
+        # simulation clock, which slow time slows down with everything else
+        self.events = EventScheduler()
+        self.event_handlers = {
+            "quake_start": self.start_quake,
+            "quake_end": self.end_quake,
+            "wind_start": self.start_wind,
+            "wind_end": self.end_wind,
+            "wings_end": partial(self.end_powerup, "has_wings"),
+            "magnet_end": partial(self.end_powerup, "magnet"),
+            "slow_time_end": partial(self.end_powerup, "slow_time"),
+        }
+        self.reset_tower_effects()
         
         # Initialize platforms
         self.generate_initial_platforms()
         
+    def clear_world(self):
+        if self.world is not None:
+            # The entity lists are the backend's views and stay in sync with it
+            self.world.clear()
+            self.platforms = self.world.platforms.views
+            self.platform_index = self.world.platforms
+            self.powerups = self.world.powerups.views
+            self.powerup_index = None
+            self.hazards = self.world.hazards.views
+        else:
+            self.platforms = []
+            self.platform_index = EntityIndex()
+            self.powerups = []
+            self.powerup_index = EntityIndex()
+            self.hazards = []
+    
+    def release_entities(self):
+        # Return the object backend's entities to the pools ahead of a clear
+        if self.world is None:
+            platform_pool.release_all(self.platforms)
+            powerup_pool.release_all(self.powerups)
+            hazard_pool.release_all(self.hazards)
+    
+    def add_platform(self, platform):
+        if self.world is not None:
+            self.world.platforms.add(platform)
+        else:
+            self.platforms.append(platform)
+            self.platform_index.add(platform)
+    
+    def add_powerup(self, powerup):
+        if self.world is not None:
+            self.world.powerups.add(powerup)
+        else:
+            self.powerups.append(powerup)
+            self.powerup_index.add(powerup)
+    
+    def add_hazard(self, hazard):
+        if self.world is not None:
+            self.world.hazards.add(hazard)
+        else:
+            self.hazards.append(hazard)
+    
     def generate_initial_platforms(self):
         # Starting platform
-        self.platforms.append(Platform(SCREEN_WIDTH // 2 - 50, SCREEN_HEIGHT - 50, 100))
-        
-        # Generate initial set of platforms
-        current_y = SCREEN_HEIGHT - 150
-        while current_y > -1000:  # Generate some platforms above the screen
-            current_y -= random.randint(PLATFORM_GAP_MIN, PLATFORM_GAP_MAX)
-            platform_width = random.randint(60, 150)
-            platform_x = random.randint(0, SCREEN_WIDTH - platform_width)
-            
-            # Determine platform type
-            platform_type = PlatformType.STATIC
-            platform_chance = random.random()
-            
-            if platform_chance < 0.1:
-                platform_type = PlatformType.BOUNCE
-            elif platform_chance < 0.3:
-                platform_type = PlatformType.MOVING
-            elif platform_chance < 0.4:
-                platform_type = PlatformType.BREAKING
-                
-            self.platforms.append(Platform(platform_x, current_y, platform_width, platform_type))
-            
-            # Chance to add powerup above platform
-            if random.random() < 0.1:
-                powerup_type = random.choice(list(PowerupType))
-                self.powerups.append(Powerup(platform_x + platform_width//2 - 10, 
-                                            current_y - 30, powerup_type))
-                                            
-            # Chance to add hazard
-            if random.random() < 0.05 and current_y < SCREEN_HEIGHT - 300:  # No hazards near start
-                if random.random() < 0.5:
-                    # Spike on platform
-                    self.hazards.append(Hazard(platform_x + random.randint(10, platform_width-40), 
-                                              current_y - 15, "spike"))
-                else:
-                    # Flying bird
-                    bird_y = current_y - random.randint(50, 100)
-                    bird_speed = random.choice([-3, 3])
-                    bird_x = 0 if bird_speed > 0 else SCREEN_WIDTH
-                    self.hazards.append(Hazard(bird_x, bird_y, "bird", bird_speed))
-    
-    def generate_platforms_above(self):
-        # Generate new platforms as player climbs
-        highest_platform = min(platform.y for platform in self.platforms)
-        
-        while highest_platform > self.camera_y - SCREEN_HEIGHT:
-            new_y = highest_platform - random.randint(PLATFORM_GAP_MIN, PLATFORM_GAP_MAX)
-            platform_width = random.randint(60, 150)
-            platform_x = random.randint(0, SCREEN_WIDTH - platform_width)
-            
-            # Determine platform type - higher up means more difficult platforms
-            platform_type = PlatformType.STATIC
-            platform_chance = random.random()
-            height_factor = min(0.7, abs(new_y) / 10000)  # Increases with height
-            
-            if platform_chance < 0.1 + height_factor * 0.1:
-                platform_type = PlatformType.BOUNCE
-            elif platform_chance < 0.3 + height_factor * 0.2:
-                platform_type = PlatformType.MOVING
-            elif platform_chance < 0.4 + height_factor * 0.3:
-                platform_type = PlatformType.BREAKING
-                
-            self.platforms.append(Platform(platform_x, new_y, platform_width, platform_type))
-            highest_platform = new_y
-            
-            # Chance to add powerup above platform
-            if random.random() < 0.1:
-                powerup_type = random.choice(list(PowerupType))
-                self.powerups.append(Powerup(platform_x + platform_width//2 - 10, 
-                                            new_y - 30, powerup_type))
-                                            
-            # Chance to add hazard
-            if random.random() < 0.05 + height_factor * 0.1:
-                hazard_chance = random.random()
-                if hazard_chance < 0.4:
-                    # Spike on platform
-                    self.hazards.append(Hazard(platform_x + random.randint(10, platform_width-40), 
-                                              new_y - 15, "spike"))
-                elif hazard_chance < 0.8:
-                    # Flying bird
-                    bird_y = new_y - random.randint(50, 100)
-                    bird_speed = random.choice([-3, 3])
-                    bird_x = 0 if bird_speed > 0 else SCREEN_WIDTH
-                    self.hazards.append(Hazard(bird_x, bird_y, "bird", bird_speed))
-                else:
-                    # Falling rock
-                    rock_x = random.randint(0, SCREEN_WIDTH - 30)
-                    rock_y = new_y - random.randint(100, 200)
-                    self.hazards.append(Hazard(rock_x, rock_y, "rock", 3))
+        self.add_platform(platform_pool.acquire(*START_PLATFORM))
+        self.generate_platforms_above()
+    
+    def generate_platforms_above(self, top=None):
+        # Stream whole chunks in while the top of the tower is less than a
+        # screen above `top`, the camera by default
+        if top is None:
+            top = self.camera_y
+        while self.highest_y > top - SCREEN_HEIGHT:
+            chunk = self.tower.take(self.next_chunk)
+            for platform in chunk.platforms:
+                self.add_platform(platform)
+            for powerup in chunk.powerups:
+                self.add_powerup(powerup)
+            for hazard in chunk.hazards:
+                self.add_hazard(hazard)
+            if self.world is not None:
+                # The arrays copied the chunk; its objects go straight back
+                platform_pool.release_all(chunk.platforms)
+                powerup_pool.release_all(chunk.powerups)
+                hazard_pool.release_all(chunk.hazards)
+            self.next_chunk += 1
+            self.highest_y = chunk.top
     
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
+                if event.key == pygame.K_ESCAPE and self.death_cause is None:
                     self.game_over = not self.game_over  # Toggle pause
                 elif event.key == pygame.K_SPACE or event.key == pygame.K_UP or event.key == pygame.K_w:
                     if not self.game_over:
-                        self.player.jump()
+                        self.pending_jump = True  # applied on the next simulation step
                 elif event.key == pygame.K_r and self.game_over:
                     self.reset_game()
+                elif event.key == pygame.K_F3 and self.profiler is not None:
+                    self.show_profile = not self.show_profile
+                    self.last_frame_state = None
     
     def handle_input(self):
         if self.game_over:
@@ -544,12 +1512,34 @@ class Game:
             
         keys = pygame.key.get_pressed()
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            self.player.vel_x = -PLAYER_SPEED
+            direction = -1
         elif keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+            direction = 1
+        else:
+            direction = 0
+        jump = self.pending_jump
+        self.pending_jump = False
+        
+        if self.replay is not None:
+            self.replay.record(direction, jump)
+        self.apply_input(direction, jump)
+    
+    def move_player(self, direction):
+        if direction < 0:
+            self.player.vel_x = -PLAYER_SPEED
+        elif direction > 0:
             self.player.vel_x = PLAYER_SPEED
         else:
             self.player.vel_x *= 0.9  # Friction
     
+    def apply_input(self, direction, jump=False):
+        # Scripted equivalent of handle_events + handle_input
+        if self.game_over:
+            return
+        if jump:
+            self.player.jump()
+        self.move_player(direction)
+    
     def update(self):
         if self.game_over:
             return
@@ -557,45 +1547,49 @@ class Game:
         # Calculate time factor for slow time powerup
         time_factor = 0.5 if self.player.slow_time else 1.0
         
-        # Update tower effects
-        self.update_tower_effects(time_factor)
+        # Fire the tower and powerup events that have fallen due
+        self.run_events(time_factor)
+        self.lap("tower")
         
         # Update player
-        self.player.update(self.platforms, self.wind_force if self.wind_active else 0, time_factor)
+        self.player.update(self.platform_index, self.wind_force if self.wind_active else 0, time_factor)
+        self.lap("player")
+        
+        self.update_world(time_factor)
+    
+    def lap(self, section):
+        if self.profiler is not None:
+            self.profiler.lap(section)
+    
+    def update_world(self, time_factor):
+        # Everything in a frame that happens after the player has moved
         
         # Update camera to follow player
         if self.player.y < self.camera_y + SCROLL_THRESHOLD:
             self.camera_y = self.player.y - SCROLL_THRESHOLD
         
+        # Entities below this line are culled
+        cull_y = self.camera_y + SCREEN_HEIGHT + 100
+        
         # Update platforms
-        for platform in self.platforms[:]:
-            platform.update()
-            if platform.breaking and platform.break_timer <= 0:
-                self.platforms.remove(platform)
-            elif platform.y > self.camera_y + SCREEN_HEIGHT + 100:
-                self.platforms.remove(platform)
+        self.update_platforms(cull_y)
+        self.lap("platforms")
         
         # Generate new platforms as needed
         self.generate_platforms_above()
+        self.lap("generation")
         
         # Update powerups and check collection
-        for powerup in self.powerups[:]:
-            if powerup.y > self.camera_y + SCREEN_HEIGHT + 100:
-                self.powerups.remove(powerup)
-            elif not powerup.collected and self.player.rect.colliderect(powerup.rect):
-                self.apply_powerup(powerup)
-                powerup.collected = True
-                self.powerups.remove(powerup)
+        self.update_powerups(cull_y)
+        self.lap("powerups")
         
         # Update hazards
-        for hazard in self.hazards[:]:
-            hazard.update(time_factor)
-            if hazard.y > self.camera_y + SCREEN_HEIGHT + 100:
-                self.hazards.remove(hazard)
-            elif self.player.rect.colliderect(hazard.rect):
-                self.game_over = True
+        self.update_hazards(time_factor, cull_y)
+        self.lap("hazards")
         
         # Update score based on height
+        if self.player.y < self.top_y:
+            self.top_y = self.player.y
         height_score = max(0, int((self.player.score - self.player.y) / 10))
         if height_score > self.score:
             self.score = height_score
@@ -603,89 +1597,289 @@ class Game:
         # Check for game over
         if self.player.y > self.camera_y + SCREEN_HEIGHT:
             self.game_over = True
-            if self.score > self.high_score:
-                self.high_score = self.score
-    
-    def update_tower_effects(self, time_factor):
-        # Tower quake effect
-        if not self.quake_active:
-            self.quake_timer -= time_factor
-            if self.quake_timer <= 0:
-                self.quake_active = True
-                self.quake_duration = FPS * QUAKE_DURATION
-                self.quake_intensity = random.uniform(2, 5)
-                self.rotation_angle = random.uniform(-5, 5)
-                
-                # Shift platforms during quake
-                for platform in self.platforms:
-                    platform.x += random.randint(-30, 30)
-                    if platform.x < 0:
-                        platform.x = 0
-                    elif platform.x > SCREEN_WIDTH - platform.width:
-                        platform.x = SCREEN_WIDTH - platform.width
-                    platform.rect.x = int(platform.x)
-                    
-                    if platform.platform_type == PlatformType.MOVING:
-                        platform.original_x = platform.x
-        else:
-            self.quake_duration -= time_factor
-            if self.quake_duration <= 0:
-                self.quake_active = False
-                self.quake_timer = FPS * random.randint(QUAKE_INTERVAL_MIN, QUAKE_INTERVAL_MAX)
-                self.rotation_angle = 0
-        
-        # Wind effect
-        if not self.wind_active:
-            self.wind_timer -= time_factor
-            if self.wind_timer <= 0:
-                self.wind_active = True
-                self.wind_duration = FPS * WIND_DURATION
-                self.wind_force = random.choice([-WIND_FORCE, WIND_FORCE])
-        else:
-            self.wind_duration -= time_factor
-            if self.wind_duration <= 0:
-                self.wind_active = False
-                self.wind_timer = FPS * random.randint(WIND_INTERVAL_MIN, WIND_INTERVAL_MAX)
-                self.wind_force = 0
+            self.death_cause = "fell"
+        
+        # A death ends the run: updates stop from the next step on
+        if self.death_cause is not None:
+            self.finish_run()
+    
+    def finish_run(self):
+        if self.score > self.high_score:
+            self.high_score = self.score
+        if self.score_store is not None:
+            self.score_store.record(self.run_stats())
+    
+    def run_stats(self):
+        return {
+            "seed": self.seed,
+            "score": self.score,
+            "height": self.climbed(),
+            "cause": self.death_cause,
+            "duration": self.events.now / FPS,  # simulated seconds
+        }
+    
+    def climbed(self):
+        # Best height reached in the run, in px above the start
+        return max(0, int(PLAYER_START[1] - self.top_y))
     
-    def apply_powerup(self, powerup):
+    def update_platforms(self, cull_y):
+        if self.world is not None:
+            self.world.platforms.update()
+            self.world.platforms.cull(cull_y)
+            return
+            
+        # Compact the list in place in a single pass instead of copying it
+        # and removing culled entries one by one
+        platforms = self.platforms
+        kept = 0
+        for platform in platforms:
+            platform.update()
+            if (platform.breaking and platform.break_timer <= 0) or platform.y > cull_y:
+                self.platform_index.remove(platform)
+                platform_pool.release(platform)
+            else:
+                platforms[kept] = platform
+                kept += 1
+        del platforms[kept:]
+    
+    def update_powerups(self, cull_y):
+        if self.world is not None:
+            for powerup in self.world.powerups.touching(self.player.rect, cull_y):
+                self.apply_powerup(powerup)
+                powerup.collected = True
+            self.world.powerups.cull(cull_y)
+            return
+            
+        powerups = self.powerups
+        kept = 0
+        for powerup in powerups:
+            if powerup.y > cull_y:
+                self.powerup_index.remove(powerup)
+                powerup_pool.release(powerup)
+                continue
+            if not powerup.collected and self.player.rect.colliderect(powerup.rect):
+                self.apply_powerup(powerup)
+                powerup.collected = True
+                self.powerup_index.remove(powerup)
+                powerup_pool.release(powerup)
+                continue
+            powerups[kept] = powerup
+            kept += 1
+        del powerups[kept:]
+    
+    def update_hazards(self, time_factor, cull_y):
+        if self.world is not None:
+            self.world.hazards.update(time_factor)
+            self.world.hazards.cull(cull_y)
+            hazard = self.world.hazards.touching(self.player.rect)
+            if hazard is not None:
+                self.game_over = True
+                self.death_cause = hazard.hazard_type
+            return
+            
+        hazards = self.hazards
+        kept = 0
+        for hazard in hazards:
+            hazard.update(time_factor)
+            if hazard.y > cull_y:
+                hazard_pool.release(hazard)
+                continue
+            if self.player.rect.colliderect(hazard.rect):
+                self.game_over = True
+                self.death_cause = hazard.hazard_type
+            hazards[kept] = hazard
+            kept += 1
+        del hazards[kept:]
+    
+    def reset_tower_effects(self):
+        self.events.clear()
+        self.quake_active = False
+        self.quake_intensity = 0
+        self.rotation_angle = 0
+        self.wind_active = False
+        self.wind_force = 0
+        self.events.schedule(FPS * self.rng.randint(QUAKE_INTERVAL_MIN, QUAKE_INTERVAL_MAX), "quake_start", QUAKE_EVENTS)
+        self.events.schedule(FPS * self.rng.randint(WIND_INTERVAL_MIN, WIND_INTERVAL_MAX), "wind_start", WIND_EVENTS)
+    
+    def run_events(self, time_factor):
+        for name in self.events.advance(time_factor):
+            self.event_handlers[name]()
+    
+    def start_quake(self):
+        self.quake_active = True
+        self.quake_intensity = self.rng.uniform(2, 5)
+        self.rotation_angle = self.rng.uniform(-5, 5)
+        
+        # Shift platforms during quake
+        self.shift_platforms()
+        self.events.schedule(FPS * QUAKE_DURATION, "quake_end", QUAKE_EVENTS)
+    
+    def end_quake(self):
+        self.quake_active = False
+        self.rotation_angle = 0
+        self.events.schedule(FPS * self.rng.randint(QUAKE_INTERVAL_MIN, QUAKE_INTERVAL_MAX), "quake_start", QUAKE_EVENTS)
+    
+    def start_wind(self):
+        self.wind_active = True
+        self.wind_force = self.rng.choice([-WIND_FORCE, WIND_FORCE])
+        self.events.schedule(FPS * WIND_DURATION, "wind_end", WIND_EVENTS)
+    
+    def end_wind(self):
+        self.wind_active = False
+        self.wind_force = 0
+        self.events.schedule(FPS * self.rng.randint(WIND_INTERVAL_MIN, WIND_INTERVAL_MAX), "wind_start", WIND_EVENTS)
+    
+    def end_powerup(self, flag, player=None):
+        setattr(player if player is not None else self.player, flag, False)
+    
+    def shift_platforms(self):
+        if self.world is not None:
+            self.world.platforms.shift([self.rng.randint(-30, 30) for _ in range(len(self.platforms))])
+            return
+            
+        for platform in self.platforms:
+            platform.x += self.rng.randint(-30, 30)
+            if platform.x < 0:
+                platform.x = 0
+            elif platform.x > SCREEN_WIDTH - platform.width:
+                platform.x = SCREEN_WIDTH - platform.width
+            platform.rect.x = int(platform.x)
+            
+            if platform.platform_type == PlatformType.MOVING:
+                platform.original_x = platform.x
+    
+    def apply_powerup(self, powerup, player=None):
+        # The effect goes to `player`, the game's own player by default
+        if player is None:
+            player = self.player
         if powerup.powerup_type == PowerupType.WINGS:
-            self.player.has_wings = True
-            self.player.wings_timer = 5 * FPS  # 5 seconds
+            player.has_wings = True
+            self.extend_powerup(self.powerup_event("wings_end", player), 5 * FPS)  # 5 seconds
         elif powerup.powerup_type == PowerupType.DOUBLE_JUMP:
-            self.player.can_double_jump = True
+            player.can_double_jump = True
         elif powerup.powerup_type == PowerupType.MAGNET:
-            self.player.magnet = True
-            self.player.magnet_timer = 7 * FPS  # 7 seconds
+            player.magnet = True
+            self.extend_powerup(self.powerup_event("magnet_end", player), 7 * FPS)  # 7 seconds
         elif powerup.powerup_type == PowerupType.SLOW_TIME:
-            self.player.slow_time = True
-            self.player.slow_time_timer = 3 * FPS  # 3 seconds
+            player.slow_time = True
+            self.extend_powerup(self.powerup_event("slow_time_end", player), 3 * FPS)  # 3 seconds
     
-    def draw(self):
-        self.screen.fill(BG_COLOR)
+    def powerup_event(self, name, player):
+        # Name of the event that ends one of player's powerups
+        return name
+    
+    def extend_powerup(self, event, duration):
+        # Collecting a powerup that is already active restarts its timer
+        self.events.cancel(event)
+        self.events.schedule(duration, event, POWERUP_EVENTS)
+    
+    def view_state(self):
+        return self.camera_y, self.player.x, self.player.y
+    
+    def draw(self, alpha=None):
+        # alpha in [0, 1) renders the camera and player that fraction of a
+        # step past the previous simulation step instead of at the current one
+        if alpha is not None and self.previous_view is not None:
+            current = self.view_state()
+            self.camera_y, self.player.x, self.player.y = (
+                previous + (value - previous) * alpha
+                for previous, value in zip(self.previous_view, current))
+            try:
+                self.draw()
+            finally:
+                self.camera_y, self.player.x, self.player.y = current
+            return
+        
+        visible = self.visible_entities()
+        if self.dirty_rects:
+            frame_state = (self.camera_y, self.wind_active, self.wind_force)
+            dynamic_rects = self.dynamic_rects(visible)
+            full_redraw = (frame_state != self.last_frame_state or self.quake_active or
+                           self.game_over)
+            self.last_frame_state = None if self.game_over else frame_state
+            if not full_redraw:
+                dirty = self.last_dynamic_rects + dynamic_rects
+                for rect in dirty:
+                    self.screen.fill(BG_COLOR, rect)
+                self.draw_scene(visible)
+                pygame.display.update(dirty)
+                self.last_dynamic_rects = dynamic_rects
+                return
+            self.last_dynamic_rects = dynamic_rects
         
+        self.screen.fill(BG_COLOR)
+        self.draw_scene(visible)
+        if not self.offscreen:
+            pygame.display.flip()
+    
+    def frame(self, scale=1):
+        # (height, width, 3) RGB view of the offscreen frame buffer, keeping
+        # every scale-th pixel in each direction. It is not a copy: the next
+        # draw() overwrites it.
+        return self.frame_buffer[::scale, ::scale, :3]
+    
+    def visible_entities(self):
+        # Platforms, powerups and hazards overlapping the camera's view. The
+        # indexed platforms and powerups are found by a range query on their
+        # top edge; falling rocks move vertically, so hazards are filtered.
+        top = math.floor(self.camera_y) - MAX_ENTITY_HEIGHT
+        bottom = math.ceil(self.camera_y) + SCREEN_HEIGHT
+        if self.world is not None:
+            return (self.world.platforms.in_band(top, bottom),
+                    self.world.powerups.in_band(top, bottom),
+                    self.world.hazards.in_band(top, bottom))
+        return (list(self.platform_index.query(top, bottom)),
+                list(self.powerup_index.query(top, bottom)),
+                [hazard for hazard in self.hazards if top <= hazard.y <= bottom])
+    
+    def dynamic_rects(self, visible):
+        # Screen regions that can change while the camera is still: the player
+        # with its powerup indicators, moving and breaking platforms, powerups,
+        # hazards and the HUD text
+        camera_y = self.camera_y
+        screen_rect = self.screen.get_rect()
+        player = self.player
+        platforms, powerups, hazards = visible
+        rects = [pygame.Rect(int(player.x) - 19, int(player.y - camera_y) - 17,
+                             player.width + 30, player.height + 18)]
+        for platform in platforms:
+            if platform.breaking or platform.platform_type == PlatformType.MOVING:
+                rects.append(pygame.Rect(int(platform.x), int(platform.y - camera_y),
+                                         platform.width, platform.height))
+        for entity in powerups + hazards:
+            rects.append(pygame.Rect(int(entity.x), int(entity.y - camera_y),
+                                     entity.width, entity.height))
+        for slot, text, position in self.hud_lines():
+            rects.append(self.text_cache.render(slot, text).get_rect(topleft=position))
+        if self.show_profile:
+            rects.append(self.profiler.panel_rect)
+        return [rect.clip(screen_rect) for rect in rects if rect.colliderect(screen_rect)]
+    
+    def draw_scene(self, visible):
         # Apply tower quake effect
         if self.quake_active:
-            quake_offset_x = random.uniform(-self.quake_intensity, self.quake_intensity)
-            quake_offset_y = random.uniform(-self.quake_intensity, self.quake_intensity)
+            quake_offset_x = self.render_rng.uniform(-self.quake_intensity, self.quake_intensity)
+            quake_offset_y = self.render_rng.uniform(-self.quake_intensity, self.quake_intensity)
         else:
             quake_offset_x = 0
             quake_offset_y = 0
         
+        platforms, powerups, hazards = visible
+        
         # Draw platforms
-        for platform in self.platforms:
+        for platform in platforms:
             platform.draw(self.screen, self.camera_y)
         
         # Draw powerups
-        for powerup in self.powerups:
+        for powerup in powerups:
             powerup.draw(self.screen, self.camera_y)
         
         # Draw hazards
-        for hazard in self.hazards:
+        for hazard in hazards:
             hazard.draw(self.screen, self.camera_y)
         
         # Draw player
-        self.player.draw(self.screen, self.camera_y)
+        self.draw_players()
         
         # Draw wind effect indicator
         if self.wind_active:
@@ -698,57 +1892,477 @@ class Game:
                                 (wind_end, y_pos), 
                                 3)
         
-        # Draw score
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-        self.screen.blit(score_text, (20, 20))
-        
-        # Draw height
-        height_text = self.font.render(f"Height: {abs(int(self.player.y))}", True, WHITE)
-        self.screen.blit(height_text, (20, 60))
+        self.draw_hud()
+        if self.show_profile:
+            self.profiler.draw(self.screen)
+    
+    def draw_players(self):
+        self.player.draw(self.screen, self.camera_y)
+    
+    def hud_lines(self):
+        # (text cache slot, text, position) of the always-visible HUD
+        return [("score", f"Score: {self.score}", (20, 20)),
+                ("height", f"Height: {abs(int(self.player.y))}", (20, 60))]
+    
+    def draw_hud(self):
+        # Draw score and height
+        for slot, text, position in self.hud_lines():
+            self.screen.blit(self.text_cache.render(slot, text), position)
         
         # Draw game over screen
         if self.game_over:
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 128))
-            self.screen.blit(overlay, (0, 0))
+            self.screen.blit(self.overlay, (0, 0))
             
-            game_over_text = self.font.render("GAME OVER", True, WHITE)
-            score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-            high_score_text = self.font.render(f"High Score: {self.high_score}", True, WHITE)
-            restart_text = self.font.render("Press R to Restart", True, WHITE)
+            game_over_text = self.text_cache.render("game_over", "GAME OVER")
+            score_text = self.text_cache.render("score", f"Score: {self.score}")
+            high_score_text = self.text_cache.render("high_score", f"High Score: {self.high_score}")
+            restart_text = self.text_cache.render("restart", "Press R to Restart")
             
             self.screen.blit(game_over_text, (SCREEN_WIDTH//2 - game_over_text.get_width()//2, SCREEN_HEIGHT//2 - 80))
             self.screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, SCREEN_HEIGHT//2 - 30))
             self.screen.blit(high_score_text, (SCREEN_WIDTH//2 - high_score_text.get_width()//2, SCREEN_HEIGHT//2 + 10))
             self.screen.blit(restart_text, (SCREEN_WIDTH//2 - restart_text.get_width()//2, SCREEN_HEIGHT//2 + 60))
-        
-        pygame.display.flip()
     
-    def reset_game(self):
-        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100)
-        self.platforms = []
-        self.powerups = []
-        self.hazards = []
+    def reset_game(self, seed=None):
+        # Without an explicit seed the next one comes from the current RNG,
+        # so a chain of resets stays reproducible from the first seed
+        if seed is None:
+            seed = self.rng.getrandbits(63)
+        self.seed = seed
+        self.rng.seed(seed)
+        self.render_rng.seed(seed)
+        self.tower = TowerGenerator(seed)
+        self.next_chunk = 0
+        self.highest_y = TOWER_BASE_Y
+        self.pending_jump = False
+        self.player.reset(*PLAYER_START)
+        self.top_y = self.player.y
+        self.release_entities()
+        self.clear_world()
         self.camera_y = 0
+        self.previous_view = None
         self.score = 0
         self.game_over = False
-        self.quake_timer = FPS * random.randint(QUAKE_INTERVAL_MIN, QUAKE_INTERVAL_MAX)
-        self.quake_active = False
-        self.wind_timer = FPS * random.randint(WIND_INTERVAL_MIN, WIND_INTERVAL_MAX)
-        self.wind_active = False
+        self.death_cause = None
+        self.reset_tower_effects()
         self.generate_initial_platforms()
+        if self.record_dir is not None:
+            self.replay = Replay(self.seed)
+    
+    def start_recording(self, record_dir):
+        # Record every run from now on; each is saved to record_dir as
+        # run-<seed>.tjr when the player dies
+        os.makedirs(record_dir, exist_ok=True)
+        self.record_dir = record_dir
+        self.reset_game()
+    
+    def save_replay(self):
+        self.replay.score = self.score
+        self.replay.save(os.path.join(self.record_dir, f"run-{self.replay.seed}.tjr"))
+        self.replay = None
+    
+    def snapshot(self):
+        # Copy of the full simulation state; rendering caches are not included
+        game_state = {name: getattr(self, name) for name in SNAPSHOT_GAME_FIELDS}
+        game_state["events"] = self.events.state()
+        player_state = {name: getattr(self.player, name) for name in SNAPSHOT_PLAYER_FIELDS}
+        rng_states = (self.rng.getstate(), self.render_rng.getstate())
+        if self.world is not None:
+            entities = {kind: getattr(self.world, kind).capture(spec)
+                        for kind, spec in SNAPSHOT_COLUMNS.items()}
+        else:
+            entities = {
+                "platforms": self.pack_columns("platforms", [
+                    (p.x, p.y, p.width, p.platform_type.value, p.direction, p.original_x,
+                     p.breaking, p.break_timer) for p in self.platforms]),
+                "powerups": self.pack_columns("powerups", [
+                    (p.x, p.y, p.powerup_type.value, p.collected) for p in self.powerups]),
+                "hazards": self.pack_columns("hazards", [
+                    (h.x, h.y, h.speed, HAZARD_KINDS.index(h.hazard_type)) for h in self.hazards]),
+            }
+        return GameSnapshot(game_state, player_state, rng_states, entities)
+    
+    def pack_columns(self, kind, rows):
+        spec = SNAPSHOT_COLUMNS[kind]
+        values = list(zip(*rows)) if rows else [()] * len(spec)
+        return {name: array(typecode, column) for (name, typecode), column in zip(spec, values)}
     
-    def run(self):
+    def restore(self, snapshot):
+        for name in SNAPSHOT_GAME_FIELDS:
+            setattr(self, name, snapshot.game_state[name])
+        self.events.load_state(snapshot.game_state["events"])
+        for name, value in snapshot.player_state.items():
+            setattr(self.player, name, value)
+        self.player.rect.topleft = (int(self.player.x), int(self.player.y))
+        self.rng.setstate(snapshot.rng_states[0])
+        self.render_rng.setstate(snapshot.rng_states[1])
+        if self.tower.seed != self.seed:
+            self.tower = TowerGenerator(self.seed)
+        
+        entities = snapshot.entities
+        if self.world is not None:
+            for kind, columns in entities.items():
+                getattr(self.world, kind).restore(columns)
+        else:
+            self.release_entities()
+            self.clear_world()
+            platforms = entities["platforms"]
+            for row in zip(*(platforms[name] for name, _ in SNAPSHOT_COLUMNS["platforms"])):
+                x, y, width, kind, direction, original_x, breaking, break_timer = row
+                platform = platform_pool.acquire(x, y, width, PlatformType(kind))
+                platform.rect.x = int(x)
+                platform.rect.y = int(y)
+                platform.direction = direction
+                platform.original_x = original_x
+                platform.breaking = bool(breaking)
+                platform.break_timer = break_timer
+                self.add_platform(platform)
+            powerups = entities["powerups"]
+            for x, y, kind, collected in zip(*(powerups[name] for name, _ in SNAPSHOT_COLUMNS["powerups"])):
+                powerup = powerup_pool.acquire(x, y, PowerupType(kind))
+                powerup.rect.topleft = (int(x), int(y))
+                powerup.collected = bool(collected)
+                self.add_powerup(powerup)
+            hazards = entities["hazards"]
+            for x, y, speed, kind in zip(*(hazards[name] for name, _ in SNAPSHOT_COLUMNS["hazards"])):
+                hazard = hazard_pool.acquire(x, y, HAZARD_KINDS[kind], speed)
+                hazard.rect.topleft = (int(x), int(y))
+                self.add_hazard(hazard)
+                
+        # Nothing drawn before the restore matches the restored world
+        self.previous_view = None
+        self.last_frame_state = None
+    
+    def run(self, render_fps=FPS, interpolate=False):
+        # Fixed timestep: the simulation always advances in 1/FPS steps, as
+        # many per rendered frame as the elapsed time calls for, so physics
+        # does not depend on the render rate. render_fps=0 renders uncapped.
+        step = 1000.0 / FPS
+        accumulator = step
         while self.running:
-            self.clock.tick(FPS)
+            accumulator += self.clock.tick(render_fps)
+            if self.profiler is not None:
+                self.profiler.begin_frame()
             self.handle_events()
-            self.handle_input()
-            self.update()
-            self.draw()
+            self.lap("events")
+            
+            steps = 0
+            while accumulator >= step and steps < MAX_STEPS_PER_FRAME:
+                self.previous_view = self.view_state()
+                self.handle_input()
+                self.lap("input")
+                self.update()
+                if self.replay is not None and self.death_cause is not None:
+                    self.save_replay()
+                accumulator -= step
+                steps += 1
+            if steps == MAX_STEPS_PER_FRAME:
+                # Too far behind to catch up; drop the backlog
+                accumulator %= step
+            
+            if interpolate:
+                self.draw(accumulator / step)
+            else:
+                self.draw()
+            self.lap("draw")
+            self.tower.prefetch(self.next_chunk)
+            self.lap("generation")
+            if self.profiler is not None:
+                self.profiler.end_frame(self)
         
+        if self.score_store is not None:
+            self.score_store.close()
         pygame.quit()
         sys.exit()
 
+class ScoreStore:
+    # Finished runs in a SQLite database. Writes are queued to a background
+    # thread that inserts them in batches, so record() never blocks the
+    # frame loop; queries read through their own connection and see the
+    # runs written so far (flush() waits for the queue to drain). Alongside
+    # the runs, score_counts holds the number of runs per score, so a
+    # percentile is read off the distinct scores rather than every run.
+    COLUMNS = ("seed", "score", "height", "cause", "duration")
+    INSERT_RUN = (f"INSERT INTO runs ({', '.join(COLUMNS)}, finished) "
+                  f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))})")
+    COUNT_SCORE = ("INSERT INTO score_counts (score, runs) VALUES (?, 1) "
+                   "ON CONFLICT (score) DO UPDATE SET runs = runs + 1")
+    WRITE_ERRORS = (sqlite3.Error, OverflowError, ValueError)
+    
+    def __init__(self, path):
+        self.path = path
+        self.pending = queue.Queue()
+        connection = self.connect()
+        connection.execute("CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, seed INTEGER, "
+                           "score INTEGER, height INTEGER, cause TEXT, duration REAL, finished REAL)")
+        connection.execute("CREATE INDEX IF NOT EXISTS runs_by_score ON runs (score)")
+        connection.execute("CREATE TABLE IF NOT EXISTS score_counts (score INTEGER PRIMARY KEY, runs INTEGER)")
+        # Databases written before score_counts existed are counted once
+        if connection.execute("SELECT NOT EXISTS (SELECT 1 FROM score_counts)").fetchone()[0]:
+            connection.execute("INSERT INTO score_counts SELECT score, COUNT(*) FROM runs "
+                               "WHERE score IS NOT NULL GROUP BY score")
+        connection.commit()
+        self.reader = connection
+        self.writer = threading.Thread(target=self.write_loop, name="score-store", daemon=True)
+        self.writer.start()
+        
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        # Readers and the writer thread do not block each other in WAL mode
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+        
+    def record(self, run):
+        self.pending.put([run])
+        
+    def record_many(self, runs):
+        # One queue entry, and one transaction, for a whole batch
+        runs = list(runs)
+        if runs:
+            self.pending.put(runs)
+        
+    def write_loop(self):
+        connection = self.connect()
+        while True:
+            batches = [self.pending.get()]
+            # Everything queued meanwhile goes into the same transaction
+            while True:
+                try:
+                    batches.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            closing = None in batches
+            try:
+                now = time.time()
+                runs = [run for batch in batches if batch is not None for run in batch]
+                if runs:
+                    self.write(connection, [tuple(run.get(name) for name in self.COLUMNS) + (now,)
+                                            for run in runs])
+            finally:
+                # flush() must not wait forever on a batch that failed
+                for _ in batches:
+                    self.pending.task_done()
+            if closing:
+                connection.close()
+                return
+                
+    def write(self, connection, rows):
+        # One transaction for the batch. If it fails, each row is retried in
+        # a transaction of its own, so a bad row only loses itself.
+        try:
+            self.insert(connection, rows)
+        except self.WRITE_ERRORS:
+            for row in rows:
+                try:
+                    self.insert(connection, [row])
+                except self.WRITE_ERRORS as error:
+                    print(f"ScoreStore: run not saved ({error}): {row}", file=sys.stderr)
+                    
+    def insert(self, connection, rows):
+        with connection:
+            connection.executemany(self.INSERT_RUN, rows)
+            connection.executemany(self.COUNT_SCORE, [(row[1],) for row in rows if row[1] is not None])
+            
+    def flush(self):
+        self.pending.join()
+        
+    def close(self):
+        if self.writer.is_alive():
+            self.pending.put(None)
+            self.writer.join()
+        self.reader.close()
+        
+    def count(self):
+        return self.reader.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        
+    def best(self):
+        return self.reader.execute("SELECT COALESCE(MAX(score), 0) FROM runs").fetchone()[0]
+        
+    def top(self, count=10):
+        cursor = self.reader.execute(
+            f"SELECT {', '.join(self.COLUMNS)}, finished FROM runs ORDER BY score DESC LIMIT ?", (count,))
+        return [dict(zip(self.COLUMNS + ("finished",), row)) for row in cursor]
+        
+    def percentile(self, fraction):
+        # Score at the given fraction of all scored runs: the first score
+        # whose running total of runs passes that rank. The scan is over
+        # distinct scores, not runs.
+        total = self.reader.execute("SELECT COALESCE(SUM(runs), 0) FROM score_counts").fetchone()[0]
+        if total == 0:
+            return None
+        rank = min(total - 1, int(total * fraction))
+        return self.reader.execute(
+            "SELECT score FROM (SELECT score, SUM(runs) OVER (ORDER BY score) AS below FROM score_counts) "
+            "WHERE below > ? ORDER BY score LIMIT 1", (rank,)).fetchone()[0]
+
+class Replay:
+    # Seed plus one input byte per simulation step: bits 0-1 hold
+    # direction + 1 and bit 2 the jump flag. Saved files are a fixed header
+    # (magic, seed, step count, final score) followed by the zlib-compressed
+    # input bytes. The seed is stored signed, so any seed a Game accepts
+    # within 64 bits, negative ones included, can be saved.
+    MAGIC = b"TJR1"
+    HEADER = struct.Struct("<4sqII")
+    
+    def __init__(self, seed, inputs=b"", score=0):
+        self.seed = seed
+        self.inputs = bytearray(inputs)
+        self.score = score
+        
+    def __len__(self):
+        return len(self.inputs)
+        
+    def record(self, direction, jump):
+        self.inputs.append((direction + 1) | (4 if jump else 0))
+        
+    def actions(self):
+        return [((code & 3) - 1, bool(code & 4)) for code in self.inputs]
+        
+    def save(self, path):
+        with open(path, "wb") as replay_file:
+            replay_file.write(self.HEADER.pack(self.MAGIC, self.seed, len(self.inputs), self.score))
+            replay_file.write(zlib.compress(bytes(self.inputs)))
+            
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as replay_file:
+            data = replay_file.read()
+        magic, seed, steps, score = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise ValueError(f"{path} is not a Tower Jumper replay")
+        inputs = zlib.decompress(data[cls.HEADER.size:])
+        if len(inputs) != steps:
+            raise ValueError(f"{path} is truncated: expected {steps} steps, found {len(inputs)}")
+        return cls(seed, inputs, score)
+
+# Input sources for headless runs: callables taking (game, frame) and
+# returning (direction, jump) where direction is -1, 0 or 1
+def idle_input(game, frame):
+    return 0, False
+
+class ScriptedInput:
+    def __init__(self, actions, loop=False):
+        self.actions = list(actions)
+        self.loop = loop
+        
+    def __call__(self, game, frame):
+        if not self.actions:
+            return 0, False
+        if self.loop:
+            return self.actions[frame % len(self.actions)]
+        if frame < len(self.actions):
+            return self.actions[frame]
+        return 0, False
+
+def climber_input(game, frame):
+    # Simple bot: jump whenever grounded, steer under the next platform up
+    # while rising and onto the nearest platform below the feet while falling.
+    # A platform only a double jump reaches is aimed for too: if it is still
+    # above the feet at the apex, the second jump is fired there.
+    player = game.player
+    if not player.is_jumping:
+        return 0, True
+    mode = "double" if player.can_double_jump else "jump"
+    reach = jump_envelope.apex[mode] - 8
+    rising = player.vel_y < 0
+    target = None
+    for platform in game.platforms:
+        rise = player.rect.bottom - platform.y
+        if rising:
+            # The lowest platform worth climbing to
+            if 20 < rise < reach and (target is None or platform.y > target.y):
+                target = platform
+        elif rise <= 0 and (target is None or platform.y < target.y):
+            # The nearest platform below the feet
+            target = platform
+    jump = False
+    if target is not None and player.can_double_jump and -1 < player.vel_y < 0:
+        # Near the apex: the rest of this arc won't lift the feet onto it
+        jump = target.y < player.rect.bottom
+    direction = 0
+    if target is not None:
+        target_center = target.x + target.width / 2
+        player_center = player.x + player.width / 2
+        if target_center < player_center - 10:
+            direction = -1
+        elif target_center > player_center + 10:
+            direction = 1
+    return direction, jump
+
+class HeadlessRunner:
+    def __init__(self, game=None, input_source=idle_input, record=False):
+        self.game = game if game is not None else Game(headless=True)
+        self.input_source = input_source
+        self.frames = 0
+        # Inputs are recorded against the game's state at this point, which
+        # must be a fresh world for the replay to reproduce the run
+        self.replay = Replay(self.game.seed) if record else None
+        
+    def step(self):
+        profiler = self.game.profiler
+        if profiler is not None:
+            profiler.begin_frame()
+        direction, jump = self.input_source(self.game, self.frames)
+        recording = self.replay is not None and not self.game.game_over
+        if recording:
+            self.replay.record(direction, jump)
+        self.game.apply_input(direction, jump)
+        self.game.lap("input")
+        self.game.update()
+        if recording:
+            self.replay.score = self.game.score
+        if profiler is not None:
+            profiler.end_frame(self.game)
+        self.frames += 1
+        
+    def run(self, max_frames, stop_on_game_over=True):
+        start_frames = self.frames
+        start_time = time.perf_counter()
+        while self.frames - start_frames < max_frames:
+            if stop_on_game_over and self.game.game_over:
+                break
+            self.step()
+        elapsed = time.perf_counter() - start_time
+        steps = self.frames - start_frames
+        return {
+            "frames": steps,
+            "elapsed": elapsed,
+            "steps_per_sec": steps / elapsed if elapsed > 0 else float("inf"),
+            "score": self.game.score,
+            "height": self.game.climbed(),
+            "game_over": self.game.game_over,
+            "cause": self.game.death_cause,
+        }
+
+def run_headless(frames, vectorized=False, profile_path=None):
+    game = Game(headless=True, vectorized=vectorized, profile=profile_path is not None)
+    runner = HeadlessRunner(game, climber_input)
+    result = runner.run(frames)
+    print("Frames: {frames}  Score: {score}  Height: {height}  "
+          "Steps/sec: {steps_per_sec:.0f}".format(**result))
+    if profile_path is not None:
+        game.profiler.export(profile_path)
+        for name, stats in game.profiler.summary().items():
+            print(f"{name:<11} p50 {stats['p50']:.4f} ms  p99 {stats['p99']:.4f} ms")
+
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    if "--headless" in sys.argv:
+        frames = 100000
+        if "--frames" in sys.argv:
+            frames = int(sys.argv[sys.argv.index("--frames") + 1])
+        profile_path = None
+        if "--profile-out" in sys.argv:
+            profile_path = sys.argv[sys.argv.index("--profile-out") + 1]
+        run_headless(frames, "--vectorized" in sys.argv, profile_path)
+    else:
+        scores_path = os.path.join(os.path.expanduser("~"), ".tower_jumper_scores.db")
+        if "--scores" in sys.argv:
+            scores_path = sys.argv[sys.argv.index("--scores") + 1]
+        game = Game(vectorized="--vectorized" in sys.argv, dirty_rects="--dirty-rects" in sys.argv,
+                    profile="--profile" in sys.argv, score_store=ScoreStore(scores_path))
+        if "--record" in sys.argv:
+            game.start_recording(sys.argv[sys.argv.index("--record") + 1])
+        render_fps = FPS
+        if "--render-fps" in sys.argv:
+            render_fps = int(sys.argv[sys.argv.index("--render-fps") + 1])
+        game.run(render_fps, "--interpolate" in sys.argv)